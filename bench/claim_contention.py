@@ -0,0 +1,116 @@
+"""Open-shift claim contention: hundreds of employees claim the same shift at once.
+
+    python -m bench.claim_contention --claimants 300 --rounds 5 --output bench-claims.json
+
+Each round posts one open shift, releases every claimant from a barrier
+against a live local server, and checks that exactly one claim returned
+200 (the rest 409). Exits non-zero if any round had zero or several
+winners.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime, timedelta
+
+from bench.harness import summarize, write_results
+from bench.run import build_app, login, start_local_server
+from bench.seed import Scale, seed
+
+
+def claim(base_url, shift_id, employee_id, token, barrier, results, index):
+    request = urllib.request.Request(
+        f'{base_url}/schedule/shifts/{shift_id}/claim',
+        data=json.dumps({'employee_id': employee_id}).encode(), method='POST')
+    request.add_header('Content-Type', 'application/json')
+    request.add_header('Authorization', f'Bearer {token}')
+    barrier.wait()
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as exc:
+        exc.read()
+        status = exc.code
+    except OSError:  # refused or reset: the server's listen backlog overflowed
+        status = 0
+    results[index] = (time.perf_counter() - started, status)
+
+
+def run_round(base_url, shift_id, claimants, token):
+    barrier = threading.Barrier(len(claimants))
+    results = [None] * len(claimants)
+    threads = [threading.Thread(target=claim, args=(base_url, shift_id, employee_id, token, barrier, results, i))
+               for i, employee_id in enumerate(claimants)]
+    wall_start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, time.perf_counter() - wall_start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--claimants', type=int, default=200)
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--database-url', help='defaults to a scratch SQLite file')
+    parser.add_argument('--output', default='bench-results-claims.json')
+    args = parser.parse_args(argv)
+
+    database_url = args.database_url or 'sqlite:///' + os.path.join(tempfile.mkdtemp(prefix='crewly-bench-'), 'bench.db')
+    app = build_app(database_url)
+    with app.app_context():
+        tenant = seed(Scale(businesses=1, employees=args.claimants + 1, weeks=1, time_off=0))[0]
+
+    client = app.test_client()
+    token = login(client, tenant)
+    auth = {'Authorization': f'Bearer {token}'}
+    holder, claimants = tenant['employee_ids'][0], tenant['employee_ids'][1:]
+    # Far past the seeded weeks so no claimant has a conflicting shift
+    first_day = datetime.utcnow().replace(hour=9, minute=0, second=0, microsecond=0) + timedelta(days=365)
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)  # no access log line per claim
+    server, base_url = start_local_server(app)
+    latencies, statuses, winners = [], {}, []
+    wall = 0.0
+    try:
+        for r in range(args.rounds):
+            start = first_day + timedelta(days=r)
+            response = client.post('/schedule/shifts', headers=auth, json={
+                'employee_id': holder, 'status': 'open',
+                'start_time': start.strftime('%Y-%m-%d %H:%M:%S'),
+                'end_time': (start + timedelta(hours=8)).strftime('%Y-%m-%d %H:%M:%S'),
+            })
+            shift_id = response.get_json()['shift']['id']
+
+            results, round_wall = run_round(base_url, shift_id, claimants, token)
+            wall += round_wall
+            for latency, status in results:
+                latencies.append(latency)
+                statuses[status] = statuses.get(status, 0) + 1
+            winners.append(sum(1 for _, status in results if status == 200))
+    finally:
+        server.shutdown()
+
+    results = {
+        'claims': summarize(latencies, wall, statuses),
+        'winners_per_round': winners,
+        'exactly_one_winner': all(count == 1 for count in winners),
+    }
+    write_results(args.output, 'claim_contention',
+                  {'claimants': args.claimants, 'rounds': args.rounds, 'database': database_url.split(':', 1)[0]},
+                  results)
+    print(json.dumps(results, indent=2))
+    return 0 if results['exactly_one_winner'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
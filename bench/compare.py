@@ -0,0 +1,51 @@
+"""Compare two benchmark result files and flag latency regressions.
+
+    python -m bench.compare baseline.json candidate.json --threshold 20
+
+Exits non-zero when any scenario's p95 grew by more than ``--threshold``
+percent.
+"""
+import argparse
+import json
+import sys
+
+
+def iter_scenarios(results, prefix=''):
+    for key, value in results.items():
+        if isinstance(value, dict) and 'p95_ms' in value:
+            yield prefix + key, value
+        elif isinstance(value, dict):
+            yield from iter_scenarios(value, f'{prefix}{key}.')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('baseline')
+    parser.add_argument('candidate')
+    parser.add_argument('--threshold', type=float, default=20.0, help='allowed p95 growth in percent')
+    args = parser.parse_args(argv)
+
+    with open(args.baseline) as fh:
+        baseline = dict(iter_scenarios(json.load(fh)['results']))
+    with open(args.candidate) as fh:
+        candidate = dict(iter_scenarios(json.load(fh)['results']))
+
+    regressions = []
+    print(f'{"scenario":40} {"base p95":>10} {"new p95":>10} {"change":>8}')
+    for name in sorted(set(baseline) & set(candidate)):
+        old, new = baseline[name]['p95_ms'], candidate[name]['p95_ms']
+        if not old or new is None:
+            continue
+        change = (new - old) / old * 100
+        print(f'{name:40} {old:10.2f} {new:10.2f} {change:+7.1f}%')
+        if change > args.threshold:
+            regressions.append(name)
+
+    if regressions:
+        print(f'p95 regressions above {args.threshold}%: {", ".join(regressions)}')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,71 @@
+"""Timing, summary and result-file helpers shared by the benchmark scripts."""
+import json
+import math
+import os
+import platform
+import subprocess
+import time
+from datetime import datetime
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    # Nearest-rank percentile
+    index = min(len(sorted_values) - 1, max(0, math.ceil(pct / 100.0 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies, wall_seconds, statuses=None):
+    """Summarize per-request latencies (seconds) measured over ``wall_seconds``."""
+    ordered = sorted(latencies)
+    ms = lambda value: round(value * 1000, 3) if value is not None else None
+    summary = {
+        'requests': len(ordered),
+        'throughput_rps': round(len(ordered) / wall_seconds, 2) if wall_seconds else None,
+        'p50_ms': ms(percentile(ordered, 50)),
+        'p95_ms': ms(percentile(ordered, 95)),
+        'p99_ms': ms(percentile(ordered, 99)),
+        'max_ms': ms(ordered[-1] if ordered else None),
+    }
+    if statuses is not None:
+        summary['statuses'] = {str(code): count for code, count in sorted(statuses.items())}
+    return summary
+
+
+def timed(fn, iterations):
+    """Call ``fn`` ``iterations`` times; return (latencies, wall_seconds, statuses)."""
+    latencies = []
+    statuses = {}
+    wall_start = time.perf_counter()
+    for i in range(iterations):
+        started = time.perf_counter()
+        status = fn(i)
+        latencies.append(time.perf_counter() - started)
+        statuses[status] = statuses.get(status, 0) + 1
+    return latencies, time.perf_counter() - wall_start, statuses
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)), stderr=subprocess.DEVNULL,
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_results(path, name, parameters, results):
+    """Write a results document that can be diffed between commits."""
+    document = {
+        'benchmark': name,
+        'revision': git_revision(),
+        'timestamp': datetime.utcnow().isoformat() + 'Z',
+        'python': platform.python_version(),
+        'parameters': parameters,
+        'results': results,
+    }
+    with open(path, 'w') as fh:
+        json.dump(document, fh, indent=2, sort_keys=True)
+    return document
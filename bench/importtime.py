@@ -0,0 +1,98 @@
+"""Worker boot-time benchmark: ``-X importtime`` profile plus create_app() wall time.
+
+    python -m bench.importtime --output bench-importtime.json
+    python -m bench.importtime --baseline bench-importtime.json --threshold 25
+
+Exits non-zero when ``import src.main`` or the full boot exceeds
+``--budget-ms`` or grew by more than ``--threshold`` percent over the
+baseline, so it can gate regressions in CI.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from bench.harness import write_results
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BOOT_SNIPPET = """
+import sys, time
+started = time.perf_counter()
+from src.main import create_app
+create_app({'SQLALCHEMY_DATABASE_URI': sys.argv[1]})
+print(time.perf_counter() - started)
+"""
+
+
+def profile_import(module):
+    """Return ({module: (self_us, cumulative_us)}, cumulative_us of ``module``)."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT, capture_output=True, text=True, check=True)
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules, modules[module][1]
+
+
+def measure_boot(runs):
+    timings = []
+    for _ in range(runs):
+        database_url = 'sqlite:///' + os.path.join(tempfile.mkdtemp(prefix='crewly-boot-'), 'boot.db')
+        result = subprocess.run([sys.executable, '-c', BOOT_SNIPPET, database_url],
+                                cwd=ROOT, capture_output=True, text=True, check=True)
+        timings.append(float(result.stdout.strip().splitlines()[-1]))
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15, help='slowest modules to report')
+    parser.add_argument('--budget-ms', type=float, help='fail if median boot exceeds this')
+    parser.add_argument('--baseline', help='previous result file to compare against')
+    parser.add_argument('--threshold', type=float, default=25.0, help='allowed growth in percent')
+    parser.add_argument('--output', default='bench-results-importtime.json')
+    args = parser.parse_args(argv)
+
+    import_runs = [profile_import('src.main') for _ in range(args.runs)]
+    modules, _ = import_runs[0]
+    slowest = sorted(modules.items(), key=lambda item: item[1][0], reverse=True)[:args.top]
+    boot = measure_boot(args.runs)
+
+    results = {
+        'import_src_main_ms': round(statistics.median(run[1] for run in import_runs) / 1000, 2),
+        'boot_ms': round(statistics.median(boot) * 1000, 2),
+        'modules_imported': len(modules),
+        'slowest_modules': [{'module': name, 'self_ms': round(s / 1000, 2), 'cumulative_ms': round(c / 1000, 2)}
+                            for name, (s, c) in slowest],
+    }
+    write_results(args.output, 'importtime', {'runs': args.runs}, results)
+    print(json.dumps(results, indent=2))
+
+    failures = []
+    if args.budget_ms and results['boot_ms'] > args.budget_ms:
+        failures.append(f'boot {results["boot_ms"]} ms exceeds budget {args.budget_ms} ms')
+    if args.baseline:
+        with open(args.baseline) as fh:
+            baseline = json.load(fh)['results']
+        for key in ('import_src_main_ms', 'boot_ms'):
+            growth = (results[key] - baseline[key]) / baseline[key] * 100
+            print(f'{key}: {baseline[key]} -> {results[key]} ({growth:+.1f}%)')
+            if growth > args.threshold:
+                failures.append(f'{key} grew {growth:.1f}% (threshold {args.threshold}%)')
+
+    for failure in failures:
+        print(f'REGRESSION: {failure}')
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,195 @@
+"""API benchmark: seed synthetic tenants, then drive the real blueprints.
+
+Each scenario is run in-process through the Flask test client and,
+with ``--http``, through a multi-process HTTP load generator against a
+live server (a local threaded server on the seeded database, or any
+running deployment via ``--target-url``).
+
+    python -m bench.run --scale medium --iterations 200 --http --processes 4 \\
+        --output bench-results.json
+
+Compare two result files with ``python -m bench.compare old.json new.json``.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from dataclasses import asdict, replace
+from datetime import datetime, timedelta
+
+from bench.harness import summarize, timed, write_results
+from bench.seed import BENCH_PASSWORD, SCALES, seed
+
+
+def build_app(database_url):
+    from src.main import create_app
+    return create_app({'SQLALCHEMY_DATABASE_URI': database_url, 'SLOW_QUERY_MS': 0, 'RATELIMIT_ENABLED': False})
+
+
+def make_scenarios(app, tenant, token, rng):
+    """Return ``{name: request_factory}``; each factory maps an index to a request tuple."""
+    auth = {'Authorization': f'Bearer {token}'}
+    today = datetime.utcnow().date()
+    monday = today - timedelta(days=today.weekday())
+    week_range = f'start_date={monday:%Y-%m-%d}&end_date={monday + timedelta(days=6):%Y-%m-%d}'
+    employee_ids = tenant['employee_ids']
+    routes = {rule.rule for rule in app.url_map.iter_rules()}
+
+    def create_shift(i):
+        start = datetime.combine(monday, datetime.min.time()) + timedelta(
+            days=rng.randrange(7, 365), hours=rng.choice((6, 8, 10, 14)))
+        return ('POST', '/schedule/shifts', {
+            'employee_id': rng.choice(employee_ids),
+            'start_time': start.strftime('%Y-%m-%d %H:%M:%S'),
+            'end_time': (start + timedelta(hours=6)).strftime('%Y-%m-%d %H:%M:%S'),
+            'role': 'bench',
+        }, auth)
+
+    scenarios = {
+        'login': lambda i: ('POST', '/auth/login', {'email': tenant['email'], 'password': BENCH_PASSWORD}, {}),
+        'list_shifts': lambda i: ('GET', f'/schedule/shifts?{week_range}&per_page=200', None, auth),
+        'create_shift': create_shift,
+        'stats': lambda i: ('GET', '/business/stats', None, auth),
+    }
+    required = {'stats': '/business/stats'}
+    return {name: factory for name, factory in scenarios.items()
+            if required.get(name) is None or required[name] in routes}
+
+
+def login(client, tenant):
+    response = client.post('/auth/login', json={'email': tenant['email'], 'password': BENCH_PASSWORD})
+    if response.status_code != 200:
+        raise RuntimeError(f'Benchmark login failed: {response.status_code} {response.get_data(as_text=True)}')
+    return response.get_json()['token']
+
+
+def run_test_client(app, scenarios, iterations):
+    client = app.test_client()
+    results = {}
+    for name, factory in scenarios.items():
+        def call(i):
+            method, path, body, headers = factory(i)
+            return client.open(path, method=method, json=body, headers=headers).status_code
+        call(0)  # warm up caches and lazy imports
+        results[name] = summarize(*timed(call, iterations))
+    return results
+
+
+def _http_worker(job):
+    base_url, requests = job
+    latencies = []
+    statuses = {}
+    for method, path, body, headers in requests:
+        data = json.dumps(body).encode() if body is not None else None
+        request = urllib.request.Request(base_url + path, data=data, method=method)
+        request.add_header('Content-Type', 'application/json')
+        for key, value in headers.items():
+            request.add_header(key, value)
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request) as response:
+                response.read()
+                status = response.status
+        except urllib.error.HTTPError as exc:
+            exc.read()
+            status = exc.code
+        except urllib.error.URLError:
+            status = 0
+        latencies.append(time.perf_counter() - started)
+        statuses[status] = statuses.get(status, 0) + 1
+    return latencies, statuses
+
+
+def run_http(base_url, scenarios, requests_per_scenario, processes):
+    results = {}
+    with multiprocessing.Pool(processes) as pool:
+        for name, factory in scenarios.items():
+            requests = [factory(i) for i in range(requests_per_scenario)]
+            chunks = [(base_url, requests[p::processes]) for p in range(processes)]
+            wall_start = time.perf_counter()
+            outcomes = pool.map(_http_worker, chunks)
+            wall = time.perf_counter() - wall_start
+            latencies = [value for chunk, _ in outcomes for value in chunk]
+            statuses = {}
+            for _, chunk_statuses in outcomes:
+                for code, count in chunk_statuses.items():
+                    statuses[code] = statuses.get(code, 0) + count
+            results[name] = summarize(latencies, wall, statuses)
+    return results
+
+
+def start_local_server(app):
+    from werkzeug.serving import make_server
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_port}'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', choices=sorted(SCALES), default='small')
+    parser.add_argument('--businesses', type=int)
+    parser.add_argument('--employees', type=int)
+    parser.add_argument('--weeks', type=int)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--database-url', help='defaults to a scratch SQLite file')
+    parser.add_argument('--iterations', type=int, default=100, help='test-client requests per scenario')
+    parser.add_argument('--http', action='store_true', help='also run the multi-process HTTP load generator')
+    parser.add_argument('--target-url', help='load-test a running server instead of a local one')
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=500, help='HTTP requests per scenario')
+    parser.add_argument('--output', default='bench-results.json')
+    args = parser.parse_args(argv)
+
+    scale = replace(SCALES[args.scale], **{
+        key: getattr(args, key) for key in ('businesses', 'employees', 'weeks') if getattr(args, key) is not None
+    })
+    database_url = args.database_url or 'sqlite:///' + os.path.join(tempfile.mkdtemp(prefix='crewly-bench-'), 'bench.db')
+    app = build_app(database_url)
+
+    with app.app_context():
+        seed_started = time.perf_counter()
+        tenants = seed(scale, rng_seed=args.seed)
+        seed_seconds = time.perf_counter() - seed_started
+
+    tenant = tenants[0]
+    token = login(app.test_client(), tenant)
+    scenarios = make_scenarios(app, tenant, token, random.Random(args.seed))
+
+    results = {
+        'seed_seconds': round(seed_seconds, 3),
+        'test_client': run_test_client(app, scenarios, args.iterations),
+    }
+
+    if args.http:
+        server = None
+        base_url = args.target_url
+        if not base_url:
+            server, base_url = start_local_server(app)
+        try:
+            results['http'] = run_http(base_url, scenarios, args.requests, args.processes)
+        finally:
+            if server is not None:
+                server.shutdown()
+
+    parameters = {
+        'scale': asdict(scale),
+        'database': database_url.split(':', 1)[0],
+        'iterations': args.iterations,
+        'http': args.http,
+        'processes': args.processes,
+        'requests': args.requests,
+        'skipped_scenarios': sorted({'login', 'list_shifts', 'create_shift', 'stats'} - set(scenarios)),
+    }
+    document = write_results(args.output, 'api', parameters, results)
+    print(json.dumps(document['results'], indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""Payload size and latency: /schedule/week vs paging /schedule/shifts.
+
+    python -m bench.week_view --scale medium --iterations 50 --output bench-week.json
+
+The baseline fetches the same week the way the UI does today, by paging
+through ``GET /schedule/shifts`` until every shift has been read.
+"""
+import argparse
+import gzip
+import json
+import os
+import tempfile
+from dataclasses import asdict, replace
+from datetime import datetime, timedelta
+
+from bench.harness import summarize, timed, write_results
+from bench.run import build_app, login
+from bench.seed import SCALES, seed
+
+
+def fetch_week_paged(client, auth, monday, per_page):
+    week_range = f'start_date={monday:%Y-%m-%d}&end_date={monday + timedelta(days=6):%Y-%m-%d}'
+    bodies = []
+    page = 1
+    while True:
+        response = client.get(f'/schedule/shifts?{week_range}&page={page}&per_page={per_page}', headers=auth)
+        bodies.append(response.get_data())
+        data = response.get_json()
+        if page * per_page >= data['total']:
+            return bodies
+        page += 1
+
+
+def fetch_week_grid(client, auth, monday):
+    return [client.get(f'/schedule/week?week_start={monday:%Y-%m-%d}', headers=auth).get_data()]
+
+
+def payload_stats(bodies):
+    return {
+        'requests': len(bodies),
+        'bytes': sum(len(body) for body in bodies),
+        'gzip_bytes': sum(len(gzip.compress(body)) for body in bodies),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', choices=sorted(SCALES), default='small')
+    parser.add_argument('--employees', type=int)
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--per-page', type=int, default=50)
+    parser.add_argument('--output', default='bench-results-week.json')
+    args = parser.parse_args(argv)
+
+    scale = replace(SCALES[args.scale], businesses=1)
+    if args.employees:
+        scale = replace(scale, employees=args.employees)
+    database_url = 'sqlite:///' + os.path.join(tempfile.mkdtemp(prefix='crewly-bench-'), 'bench.db')
+    app = build_app(database_url)
+    with app.app_context():
+        tenant = seed(scale)[0]
+
+    client = app.test_client()
+    auth = {'Authorization': f'Bearer {login(client, tenant)}'}
+    today = datetime.utcnow().date()
+    monday = today - timedelta(days=today.weekday())
+
+    variants = {
+        'shifts_paged': lambda: fetch_week_paged(client, auth, monday, args.per_page),
+        'week_grid': lambda: fetch_week_grid(client, auth, monday),
+    }
+    results = {}
+    for name, fetch in variants.items():
+        bodies = fetch()
+        results[name] = dict(payload_stats(bodies), latency=summarize(*timed(lambda i: fetch() and 200, args.iterations)))
+
+    paged, grid = results['shifts_paged'], results['week_grid']
+    results['reduction'] = {
+        'bytes': round(paged['bytes'] / grid['bytes'], 2),
+        'gzip_bytes': round(paged['gzip_bytes'] / grid['gzip_bytes'], 2),
+        'p50_latency': round(paged['latency']['p50_ms'] / grid['latency']['p50_ms'], 2),
+    }
+
+    parameters = {'scale': asdict(scale), 'iterations': args.iterations, 'per_page': args.per_page}
+    document = write_results(args.output, 'week_view', parameters, results)
+    print(json.dumps(document['results'], indent=2))
+
+
+if __name__ == '__main__':
+    main()
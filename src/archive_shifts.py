@@ -0,0 +1,26 @@
+import argparse
+from datetime import datetime, timedelta
+from src.main import app  # make sure this points to your create_app()
+from src.utils.archive import archive_shifts
+from src.utils.jobs import enqueue
+
+
+def run_archive(horizon_days=None, batch_size=1000, enqueue_job=False):
+    with app.app_context():
+        horizon_days = horizon_days or app.config['ARCHIVE_HORIZON_DAYS']
+        before = datetime.utcnow() - timedelta(days=horizon_days)
+        if enqueue_job:
+            job = enqueue('archive', {'before': before.strftime('%Y-%m-%d %H:%M:%S'), 'batch_size': batch_size})
+            print(f'Queued archive job {job.id}; run `python -m src.worker` to process it.')
+            return
+        moved = archive_shifts(before, batch_size=batch_size)
+        print(f'Archived {moved} shifts that ended before {before:%Y-%m-%d}.')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Move old shifts into the archive table.')
+    parser.add_argument('--horizon-days', type=int, help='archive shifts that ended more than this many days ago')
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--enqueue', action='store_true', help='queue the work for src.worker instead of running it here')
+    args = parser.parse_args()
+    run_archive(args.horizon_days, args.batch_size, args.enqueue)
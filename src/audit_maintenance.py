@@ -0,0 +1,32 @@
+import argparse
+from datetime import datetime
+from src.main import app  # make sure this points to your create_app()
+from src.utils.audit import compact_month, purge_before
+
+
+def months_ago(months, now=None):
+    """YYYYMM of the month ``months`` before ``now``."""
+    now = now or datetime.utcnow()
+    index = now.year * 12 + now.month - 1 - months
+    return (index // 12) * 100 + index % 12 + 1
+
+
+def run_maintenance(compact_after_months=12, retain_months=84):
+    with app.app_context():
+        from src.models import ShiftChange
+        cutoff = months_ago(compact_after_months)
+        months = [row[0] for row in ShiftChange.query.with_entities(ShiftChange.month)
+                  .filter(ShiftChange.month < cutoff).distinct()]
+        compacted = sum(compact_month(month) for month in months)
+        purged = purge_before(months_ago(retain_months))
+        print(f'Compacted {compacted} change records across {len(months)} months, purged {purged}.')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compact and expire the shift audit log.')
+    parser.add_argument('--compact-after-months', type=int, default=12,
+                        help='merge per-shift update records in months older than this')
+    parser.add_argument('--retain-months', type=int, default=84,
+                        help='delete change records older than this many months')
+    args = parser.parse_args()
+    run_maintenance(args.compact_after_months, args.retain_months)
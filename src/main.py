@@ -1,12 +1,28 @@
 from flask import Flask
-from flask_cors import CORS
-from src.extensions import db
-from src.models import *  # Imports Business, User, Employee, Shift, ShiftTemplate, TimeOffRequest, Notification
-from src.routes.auth import auth_bp
-from src.routes.schedule import schedule_bp
+import importlib
 import os
 
-def create_app():
+# (module, blueprint attribute, url prefix); modules are imported inside create_app()
+BLUEPRINTS = (
+    ('src.routes.auth', 'auth_bp', '/auth'),
+    ('src.routes.schedule', 'schedule_bp', '/schedule'),
+    ('src.routes.employee', 'employee_bp', '/employees'),
+    ('src.routes.business', 'business_bp', '/business'),
+    ('src.routes.user', 'user_bp', None),
+    ('src.routes.jobs', 'jobs_bp', '/jobs'),
+)
+
+def create_app(config=None):
+    from flask_cors import CORS
+    from src.extensions import db
+    from src.utils.instrumentation import init_instrumentation, render_metrics
+    from src.utils.search import init_employee_search
+    from src.utils.rate_limit import init_rate_limiting
+    from src.utils.compression import init_compression
+    from src.utils.ical import init_calendar
+    from src.utils.jobs import init_jobs
+    import src.models  # noqa: F401 - registers every model for create_all()
+
     app = Flask(__name__)
 
     # Absolute path for consistent SQLite location
@@ -14,28 +30,63 @@ def create_app():
     app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(basedir, 'crewly.db')}"
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     app.config['SECRET_KEY'] = 'loveThis'
+    app.config['SERVER_TIMING'] = os.getenv('SERVER_TIMING', '').lower() in ('1', 'true', 'yes')
+    app.config['SLOW_QUERY_MS'] = int(os.getenv('SLOW_QUERY_MS', '200'))
+    app.config['ARCHIVE_HORIZON_DAYS'] = int(os.getenv('ARCHIVE_HORIZON_DAYS', '365'))
+    app.config['MAX_PER_PAGE'] = int(os.getenv('MAX_PER_PAGE', '200'))
+    app.config['RATELIMIT_STORAGE_URL'] = os.getenv('RATELIMIT_STORAGE_URL', 'memory://')
+    app.config['CALENDAR_CACHE_SECONDS'] = int(os.getenv('CALENDAR_CACHE_SECONDS', '300'))
+
+    # Overrides for scripts and benchmarks (e.g. a scratch database)
+    if config:
+        app.config.update(config)
 
     # Initialize extensions
     db.init_app(app)
     CORS(app)
+    init_instrumentation(app)
+    init_rate_limiting(app)
+    init_compression(app)
+    init_calendar(app)
+    init_jobs(app)
+
+    # Compact JSON: no indentation or spaces after separators, even in debug
+    app.config['JSONIFY_PRETTYPRINT_REGULAR'] = False
+    if hasattr(app, 'json'):
+        app.json.compact = True
 
     # Register blueprints
-    app.register_blueprint(auth_bp, url_prefix='/auth')
-    app.register_blueprint(schedule_bp, url_prefix='/schedule')
+    for module_name, attribute, url_prefix in BLUEPRINTS:
+        blueprint = getattr(importlib.import_module(module_name), attribute)
+        app.register_blueprint(blueprint, url_prefix=url_prefix)
 
     # Health check route
     @app.route('/health')
     def health_check():
         return {'status': 'running'}
 
+    # Prometheus scrape endpoint
+    @app.route('/metrics')
+    def metrics():
+        return render_metrics(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
     with app.app_context():
-        db.create_all()  # Create tables if they don't exist
+        db.create_all()  # Create tables if they don't exist; src.upgrade_db adds new columns to old ones
+        init_employee_search(app)
 
     return app
 
-# Gunicorn entrypoint
-app = create_app()
+_app = None
+
+def __getattr__(name):
+    # Gunicorn entrypoint (src.main:app): the app is built on first access, not at import
+    global _app
+    if name == 'app':
+        if _app is None:
+            _app = create_app()
+        return _app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # CLI run support
 if __name__ == '__main__':
-    app.run(debug=True, port=8000)
+    create_app().run(debug=True, port=8000)
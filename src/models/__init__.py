@@ -1,2 +1,5 @@
-from .user import Business, User, Employee
-from .schedule import Shift, ShiftTemplate, TimeOffRequest, Notification
+from .user import Business, Location, User, Employee
+from .schedule import Shift, ShiftTemplate, TimeOffRequest, Notification, ShiftChange, ArchivedShift, \
+    ShiftSwapRequest
+from .idempotency import IdempotencyKey
+from .job import Job
@@ -0,0 +1,24 @@
+from datetime import datetime
+from src.extensions import db
+
+
+class IdempotencyKey(db.Model):
+    """Stored outcome of a write request, replayed when a client retries it."""
+    __tablename__ = 'idempotency_keys'
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'key_hash', name='uq_idempotency_keys_user_key'),
+        db.Index('ix_idempotency_keys_expires', 'expires_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    business_id = db.Column(db.Integer, nullable=False)
+    user_id = db.Column(db.Integer, nullable=False)
+    key_hash = db.Column(db.String(64), nullable=False)  # sha256 of method, path and key
+    request_hash = db.Column(db.String(64), nullable=False)  # sha256 of the request body
+    status_code = db.Column(db.Integer)  # NULL while the first request is still running
+    response = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+    def __repr__(self):
+        return f'<IdempotencyKey {self.key_hash[:12]} - User {self.user_id}>'
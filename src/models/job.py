@@ -0,0 +1,34 @@
+from datetime import datetime
+from src.extensions import db
+
+
+class Job(db.Model):
+    """A queued background operation, claimed and run by ``python -m src.worker``."""
+    __tablename__ = 'jobs'
+    __table_args__ = (
+        db.Index('ix_jobs_status_id', 'status', 'id'),
+        db.Index('ix_jobs_business_id', 'business_id', 'id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    business_id = db.Column(db.Integer)  # NULL for system jobs such as archiving
+    user_id = db.Column(db.Integer)
+    kind = db.Column(db.String(50), nullable=False)  # copy_week, employee_import, archive
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, succeeded, failed, cancelled
+    payload = db.Column(db.Text)  # JSON arguments for the handler
+    # Request body for imports, so a worker on any host can read it; cleared when the job finishes
+    upload = db.deferred(db.Column(db.LargeBinary))
+    result = db.Column(db.Text)  # JSON summary once finished
+    error = db.Column(db.Text)
+    progress_done = db.Column(db.Integer, nullable=False, default=0)
+    progress_total = db.Column(db.Integer)  # NULL when the size is not known up front
+    cancel_requested = db.Column(db.Boolean, nullable=False, default=False)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    worker = db.Column(db.String(100))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    heartbeat_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    def __repr__(self):
+        return f'<Job {self.id} {self.kind} {self.status}>'
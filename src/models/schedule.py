@@ -5,20 +5,37 @@ from src.extensions import db
 
 class Shift(db.Model):
     __tablename__ = 'shifts'
+    __table_args__ = (
+        db.Index('ix_shifts_business_start', 'business_id', 'start_time'),
+        db.Index('ix_shifts_business_location_start', 'business_id', 'location_id', 'start_time'),
+        db.Index('ix_shifts_employee_start', 'employee_id', 'start_time'),
+        db.Index('ix_shifts_business_status_start', 'business_id', 'status', 'start_time'),
+        db.Index('ix_shifts_copy_batch', 'copy_batch'),
+        # Archived shifts keep their ids, so SQLite must never hand out an id it used before
+        {'sqlite_autoincrement': True},
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     business_id = db.Column(db.Integer, db.ForeignKey('businesses.id'), nullable=False)
+    location_id = db.Column(db.Integer, db.ForeignKey('locations.id'))
     employee_id = db.Column(db.Integer, db.ForeignKey('employees.id'), nullable=False)
     start_time = db.Column(db.DateTime, nullable=False)
     end_time = db.Column(db.DateTime, nullable=False)
     role = db.Column(db.String(50))
     notes = db.Column(db.Text)
+    # assigned, or open: offered up for claiming; the current employee keeps it until someone claims it
+    status = db.Column(db.String(20), nullable=False, default='assigned', server_default='assigned')
+    copy_batch = db.Column(db.String(32))  # id of the copy operation that created the shift
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
     
     # Relationships
     business = db.relationship('Business', backref='shifts', lazy=True)
     employee = db.relationship('Employee', backref='shifts', lazy=True)  # backref created here
+
+    # Optimistic concurrency: UPDATE/DELETE ... WHERE version = <loaded version>
+    __mapper_args__ = {'version_id_col': version}
     
     def __repr__(self):
         return f'<Shift {self.id} - Employee {self.employee_id}>'
@@ -26,9 +43,13 @@ class Shift(db.Model):
 
 class ShiftTemplate(db.Model):
     __tablename__ = 'shift_templates'
+    __table_args__ = (
+        db.Index('ix_shift_templates_business_location', 'business_id', 'location_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     business_id = db.Column(db.Integer, db.ForeignKey('businesses.id'), nullable=False)
+    location_id = db.Column(db.Integer, db.ForeignKey('locations.id'))
     name = db.Column(db.String(100), nullable=False)
     start_time = db.Column(db.Time, nullable=False)
     end_time = db.Column(db.Time, nullable=False)
@@ -80,3 +101,76 @@ class Notification(db.Model):
 
     def __repr__(self):
         return f'<Notification {self.id} - User {self.user_id}>'
+
+
+class ShiftChange(db.Model):
+    """Append-only audit log of shift writes, keyed by month for retention."""
+    __tablename__ = 'shift_changes'
+    __table_args__ = (
+        db.Index('ix_shift_changes_shift', 'shift_id', 'id'),
+        db.Index('ix_shift_changes_employee', 'business_id', 'employee_id', 'id'),
+        db.Index('ix_shift_changes_month', 'month', 'business_id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    business_id = db.Column(db.Integer, db.ForeignKey('businesses.id'), nullable=False)
+    shift_id = db.Column(db.Integer, nullable=False)  # no FK: history outlives deleted shifts
+    employee_id = db.Column(db.Integer)
+    user_id = db.Column(db.Integer)
+    action = db.Column(db.String(10), nullable=False)  # create, update, delete, copy, compact
+    changes = db.Column(db.Text)  # compact JSON of changed fields only
+    month = db.Column(db.Integer, nullable=False)  # YYYYMM partition key
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f'<ShiftChange {self.id} - Shift {self.shift_id} {self.action}>'
+
+
+class ShiftSwapRequest(db.Model):
+    """An offer to hand a shift to another employee, optionally for one of theirs."""
+    __tablename__ = 'shift_swap_requests'
+    __table_args__ = (
+        db.Index('ix_shift_swap_requests_business_status', 'business_id', 'status', 'id'),
+        db.Index('ix_shift_swap_requests_shift', 'shift_id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    business_id = db.Column(db.Integer, db.ForeignKey('businesses.id'), nullable=False)
+    shift_id = db.Column(db.Integer, nullable=False)  # no FK: shifts may be archived
+    requester_employee_id = db.Column(db.Integer, db.ForeignKey('employees.id'), nullable=False)
+    target_employee_id = db.Column(db.Integer, db.ForeignKey('employees.id'), nullable=False)
+    target_shift_id = db.Column(db.Integer)  # the shift taken in exchange, if any
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, accepted, declined, cancelled
+    created_by = db.Column(db.Integer)  # user id
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<ShiftSwapRequest {self.id} - Shift {self.shift_id} {self.status}>'
+
+
+class ArchivedShift(db.Model):
+    """Cold copy of shifts past the archive horizon; same columns as ``shifts``."""
+    __tablename__ = 'shifts_archive'
+    __table_args__ = (
+        db.Index('ix_shifts_archive_business_start', 'business_id', 'start_time'),
+        db.Index('ix_shifts_archive_business_location_start', 'business_id', 'location_id', 'start_time'),
+        db.Index('ix_shifts_archive_employee_start', 'employee_id', 'start_time'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)  # original shifts.id
+    business_id = db.Column(db.Integer, db.ForeignKey('businesses.id'), nullable=False)
+    location_id = db.Column(db.Integer)
+    employee_id = db.Column(db.Integer, nullable=False)
+    start_time = db.Column(db.DateTime, nullable=False)
+    end_time = db.Column(db.DateTime, nullable=False)
+    role = db.Column(db.String(50))
+    notes = db.Column(db.Text)
+    status = db.Column(db.String(20), nullable=False, default='assigned', server_default='assigned')
+    created_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f'<ArchivedShift {self.id} - Employee {self.employee_id}>'
@@ -27,6 +27,25 @@ class Business(db.Model):
         return f'<Business {self.name}>'
 
 
+class Location(db.Model):
+    __tablename__ = 'locations'
+    __table_args__ = (
+        db.UniqueConstraint('business_id', 'name', name='uq_locations_business_name'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    business_id = db.Column(db.Integer, db.ForeignKey('businesses.id'), nullable=False)
+    name = db.Column(db.String(100), nullable=False)
+    address = db.Column(db.String(255))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    business = db.relationship('Business', backref='locations', lazy=True)
+
+    def __repr__(self):
+        return f'<Location {self.name}>'
+
+
 class User(db.Model):
     __tablename__ = 'users'
     
@@ -62,13 +81,19 @@ class User(db.Model):
 
 class Employee(db.Model):
     __tablename__ = 'employees'
+    __table_args__ = (
+        db.Index('ix_employees_business_name', 'business_id', 'name'),
+        db.Index('ix_employees_business_location', 'business_id', 'location_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     business_id = db.Column(db.Integer, db.ForeignKey('businesses.id'), nullable=False)
+    location_id = db.Column(db.Integer, db.ForeignKey('locations.id'))
     name = db.Column(db.String(100), nullable=False)
     email = db.Column(db.String(100), nullable=False)
     phone = db.Column(db.String(20))
     role = db.Column(db.String(50))
+    calendar_token = db.Column(db.String(64), unique=True)  # secret for the iCalendar feed URL
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -77,3 +102,9 @@ class Employee(db.Model):
     
     def __repr__(self):
         return f'<Employee {self.name}>'
+
+
+# Emails and roles are matched case-insensitively (imports, directory search), so index the lowered values.
+# An email identifies one employee per business.
+db.Index('ix_employees_business_email_lower', Employee.business_id, db.func.lower(Employee.email), unique=True)
+db.Index('ix_employees_business_role_lower', Employee.business_id, db.func.lower(Employee.role))
@@ -1,14 +1,17 @@
 from flask import Blueprint, request, jsonify
 from datetime import datetime, timedelta
-from src.models.user import db, Business, Employee
-from src.main import token_required
+from sqlalchemy.exc import IntegrityError
+from src.models.user import db, Business, Employee, Location
+from src.utils.auth_decorators import token_required
+from src.utils.locations import LocationError, location_filter
+from src.utils.tenant import current_business, scoped
 
 business_bp = Blueprint('business', __name__)
 
 @business_bp.route('/', methods=['GET'])
 @token_required
 def get_business(current_user):
-    business = Business.query.filter_by(id=current_user.business_id).first()
+    business = current_business()
     
     if not business:
         return jsonify({'message': 'Business not found!'}), 404
@@ -27,7 +30,7 @@ def update_business(current_user):
         return jsonify({'message': 'Permission denied!'}), 403
     
     data = request.get_json()
-    business = Business.query.filter_by(id=current_user.business_id).first()
+    business = current_business()
     
     if not business:
         return jsonify({'message': 'Business not found!'}), 404
@@ -57,9 +60,15 @@ def update_business(current_user):
 @business_bp.route('/stats', methods=['GET'])
 @token_required
 def get_business_stats(current_user):
-    business_id = current_user.business_id
+    try:
+        location_id = location_filter()
+    except LocationError as e:
+        return jsonify({'message': str(e)}), 400
     
-    employee_count = Employee.query.filter_by(business_id=business_id).count()
+    employee_query = scoped(Employee)
+    if location_id is not None:
+        employee_query = employee_query.filter_by(location_id=location_id)
+    employee_count = employee_query.count()
     
     current_date = datetime.now()
     start_of_week = current_date - timedelta(days=current_date.weekday())
@@ -67,19 +76,112 @@ def get_business_stats(current_user):
     
     from src.models.schedule import Shift, TimeOffRequest
     
-    shift_count = Shift.query.filter(
-        Shift.business_id == business_id,
+    shift_query = scoped(Shift).filter(
         Shift.start_time >= start_of_week,
         Shift.end_time <= end_of_week
-    ).count()
+    )
+    if location_id is not None:
+        shift_query = shift_query.filter(Shift.location_id == location_id)
+    shift_count = shift_query.count()
     
-    pending_requests = TimeOffRequest.query.filter_by(
-        business_id=business_id,
-        status='pending'
-    ).count()
+    request_query = scoped(TimeOffRequest).filter_by(status='pending')
+    if location_id is not None:
+        # Time off belongs to the employee, so count it at their home location
+        request_query = request_query.join(Employee, TimeOffRequest.employee_id == Employee.id) \
+            .filter(Employee.location_id == location_id)
+    pending_requests = request_query.count()
     
     return jsonify({
+        'location_id': location_id,
         'employee_count': employee_count,
         'shift_count': shift_count,
         'pending_requests': pending_requests
     }), 200
+
+def location_data(location):
+    return {
+        'id': location.id,
+        'name': location.name,
+        'address': location.address,
+        'created_at': location.created_at.strftime('%Y-%m-%d %H:%M:%S')
+    }
+
+@business_bp.route('/locations', methods=['GET'])
+@token_required
+def get_locations(current_user):
+    locations = scoped(Location).order_by(Location.name).all()
+    return jsonify({'locations': [location_data(location) for location in locations]}), 200
+
+@business_bp.route('/locations', methods=['POST'])
+@token_required
+def create_location(current_user):
+    if current_user.role not in ['admin', 'manager']:
+        return jsonify({'message': 'Permission denied!'}), 403
+
+    data = request.get_json() or {}
+    if not data.get('name'):
+        return jsonify({'message': 'Missing required field: name'}), 400
+
+    location = Location(business_id=current_user.business_id, name=data['name'], address=data.get('address'))
+
+    try:
+        db.session.add(location)
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({'message': 'A location with this name already exists!'}), 409
+
+    return jsonify({'message': 'Location created successfully!', 'location': location_data(location)}), 201
+
+@business_bp.route('/locations/<int:location_id>', methods=['PUT'])
+@token_required
+def update_location(current_user, location_id):
+    if current_user.role not in ['admin', 'manager']:
+        return jsonify({'message': 'Permission denied!'}), 403
+
+    location = scoped(Location).filter_by(id=location_id).first()
+    if not location:
+        return jsonify({'message': 'Location not found!'}), 404
+
+    data = request.get_json() or {}
+    if 'name' in data:
+        location.name = data['name']
+    if 'address' in data:
+        location.address = data['address']
+
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({'message': 'A location with this name already exists!'}), 409
+
+    return jsonify({'message': 'Location updated successfully!', 'location': location_data(location)}), 200
+
+@business_bp.route('/locations/<int:location_id>', methods=['DELETE'])
+@token_required
+def delete_location(current_user, location_id):
+    if current_user.role != 'admin':
+        return jsonify({'message': 'Permission denied!'}), 403
+
+    location = scoped(Location).filter_by(id=location_id).first()
+    if not location:
+        return jsonify({'message': 'Location not found!'}), 404
+
+    from src.models.schedule import Shift, ShiftTemplate, ArchivedShift
+    from src.utils.audit import record_location_removed
+    from src.utils.ical import invalidate_calendars
+
+    # Detach rather than delete: shifts and staff stay with the business. Shifts
+    # get a new version (stale If-Match edits fail) and an audit entry each.
+    record_location_removed(current_user.business_id, current_user.id, location_id)
+    Shift.query.filter_by(business_id=current_user.business_id, location_id=location_id).update(
+        {'location_id': None, 'version': Shift.version + 1, 'updated_at': datetime.utcnow()},
+        synchronize_session=False)
+    for model in (Employee, ShiftTemplate, ArchivedShift):
+        model.query.filter_by(business_id=current_user.business_id, location_id=location_id).update(
+            {'location_id': None}, synchronize_session=False)
+    db.session.delete(location)
+    db.session.commit()
+    invalidate_calendars(business_id=current_user.business_id)
+
+    return jsonify({'message': 'Location deleted successfully!'}), 200
@@ -1,41 +1,97 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, url_for
+from sqlalchemy.exc import IntegrityError
 from src.models.user import db, Employee
-from src.main import token_required
+from src.utils.auth_decorators import token_required
+from src.utils.employee_import import ImportFormatError, detect_format, import_employees, iter_rows
+from src.utils.search import employee_search_query
+from src.utils.ical import invalidate_calendars, new_calendar_token
+from src.utils.jobs import UploadTooLarge, enqueue, job_accepted, read_upload, wants_async
+from src.utils.locations import LocationError, location_filter, resolve_location
+from src.utils.pagination import page_args
+from src.utils.tenant import scoped
+from src.utils.rate_limit import rate_limited
+from src.utils.projection import FieldsError, format_datetime, requested_fields, serialize
 
 employee_bp = Blueprint('employee', __name__)
 
+EMPLOYEE_FIELDS = {
+    'id': None,
+    'location_id': None,
+    'name': None,
+    'email': None,
+    'phone': None,
+    'role': None,
+    'created_at': format_datetime
+}
+
 @employee_bp.route('/', methods=['GET'])
 @token_required
+@rate_limited(cost=2)
 def get_employees(current_user):
-    employees = Employee.query.filter_by(business_id=current_user.business_id).all()
+    page, per_page = page_args()
+    try:
+        fields = requested_fields(EMPLOYEE_FIELDS)
+        location_id = location_filter()
+    except (FieldsError, LocationError) as e:
+        return jsonify({'message': str(e)}), 400
+
+    query = scoped(Employee).with_entities(*[getattr(Employee, f) for f in fields])
+    if location_id is not None:
+        query = query.filter_by(location_id=location_id)
+    employees_paginated = query.order_by(Employee.id).paginate(page=page, per_page=per_page, error_out=False)
     
-    output = []
-    for employee in employees:
-        employee_data = {
-            'id': employee.id,
-            'name': employee.name,
-            'email': employee.email,
-            'phone': employee.phone,
-            'role': employee.role,
-            'created_at': employee.created_at.strftime('%Y-%m-%d %H:%M:%S')
-        }
-        output.append(employee_data)
+    output = [serialize(employee, fields, EMPLOYEE_FIELDS) for employee in employees_paginated.items]
     
-    return jsonify({'employees': output}), 200
+    return jsonify({
+        'employees': output,
+        'page': page,
+        'per_page': per_page,
+        'total': employees_paginated.total
+    }), 200
+
+@employee_bp.route('/search', methods=['GET'])
+@token_required
+@rate_limited(cost=2)
+def search_employees(current_user):
+    page, per_page = page_args()
+    try:
+        location_id = location_filter()
+    except LocationError as e:
+        return jsonify({'message': str(e)}), 400
+
+    query = employee_search_query(
+        current_user.business_id,
+        q=request.args.get('q'),
+        name=request.args.get('name'),
+        email=request.args.get('email'),
+        role=request.args.get('role'),
+        location_id=location_id
+    )
+
+    total = query.order_by(None).count()
+    rows = query.order_by(Employee.name, Employee.id).limit(per_page).offset((page - 1) * per_page).all()
+
+    return jsonify({
+        'employees': [
+            {'id': row.id, 'name': row.name, 'email': row.email, 'role': row.role}
+            for row in rows
+        ],
+        'page': page,
+        'per_page': per_page,
+        'total': total
+    }), 200
 
 @employee_bp.route('/<int:employee_id>', methods=['GET'])
 @token_required
 def get_employee(current_user, employee_id):
-    employee = Employee.query.filter_by(
-        id=employee_id, 
-        business_id=current_user.business_id
-    ).first()
+    employee = scoped(Employee).filter_by(id=employee_id).first()
     
     if not employee:
         return jsonify({'message': 'Employee not found!'}), 404
     
     employee_data = {
         'id': employee.id,
+        'location_id': employee.location_id,
         'name': employee.name,
         'email': employee.email,
         'phone': employee.phone,
@@ -57,22 +113,33 @@ def create_employee(current_user):
     for field in required_fields:
         if field not in data:
             return jsonify({'message': f'Missing required field: {field}'}), 400
+
+    try:
+        location_id = resolve_location(current_user.business_id, data.get('location_id'))
+    except LocationError as e:
+        return jsonify({'message': str(e)}), 400
     
     new_employee = Employee(
         business_id=current_user.business_id,
+        location_id=location_id,
         name=data['name'],
         email=data['email'],
         role=data['role'],
         phone=data.get('phone', '')
     )
     
-    db.session.add(new_employee)
-    db.session.commit()
+    try:
+        db.session.add(new_employee)
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({'message': 'Employee with this email already exists'}), 409
     
     return jsonify({
         'message': 'Employee created successfully!',
         'employee': {
             'id': new_employee.id,
+            'location_id': new_employee.location_id,
             'name': new_employee.name,
             'email': new_employee.email,
             'phone': new_employee.phone,
@@ -80,16 +147,52 @@ def create_employee(current_user):
         }
     }), 201
 
+@employee_bp.route('/import', methods=['POST'])
+@token_required
+@rate_limited(cost=20)
+def import_employees_file(current_user):
+    if current_user.role not in ['admin', 'manager']:
+        return jsonify({'message': 'Permission denied!'}), 403
+
+    upload = request.files.get('file')
+    if upload:
+        stream, filename, mimetype = upload.stream, upload.filename, upload.mimetype
+    else:
+        stream, filename, mimetype = request.stream, None, request.mimetype
+
+    chunk_size = request.args.get('chunk_size', default=500, type=int)
+    if chunk_size < 1 or chunk_size > 5000:
+        return jsonify({'message': 'chunk_size must be between 1 and 5000!'}), 400
+    update_existing = request.args.get('on_duplicate', 'update') != 'skip'
+
+    try:
+        fmt = detect_format(filename, mimetype, request.args.get('format'))
+        if wants_async():
+            # Spool the upload so the request returns before the rows are processed
+            return job_accepted(enqueue('employee_import', {
+                'format': fmt, 'chunk_size': chunk_size, 'update_existing': update_existing
+            }, current_user.business_id, current_user.id, upload=read_upload(stream)))
+        summary = import_employees(
+            current_user.business_id,
+            iter_rows(stream, fmt),
+            chunk_size=chunk_size,
+            update_existing=update_existing
+        )
+    except ImportFormatError as e:
+        return jsonify({'message': str(e)}), 400
+    except UploadTooLarge as e:
+        return jsonify({'message': str(e)}), 413
+
+    message = 'Import stopped early!' if summary['format_error'] else 'Import finished!'
+    return jsonify({'message': message, 'import': summary}), 200
+
 @employee_bp.route('/<int:employee_id>', methods=['PUT'])
 @token_required
 def update_employee(current_user, employee_id):
     if current_user.role not in ['admin', 'manager']:
         return jsonify({'message': 'Permission denied!'}), 403
     
-    employee = Employee.query.filter_by(
-        id=employee_id, 
-        business_id=current_user.business_id
-    ).first()
+    employee = scoped(Employee).filter_by(id=employee_id).first()
     
     if not employee:
         return jsonify({'message': 'Employee not found!'}), 404
@@ -104,13 +207,24 @@ def update_employee(current_user, employee_id):
         employee.phone = data['phone']
     if 'role' in data:
         employee.role = data['role']
+    if 'location_id' in data:
+        try:
+            employee.location_id = resolve_location(current_user.business_id, data['location_id'])
+        except LocationError as e:
+            return jsonify({'message': str(e)}), 400
     
-    db.session.commit()
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({'message': 'Employee with this email already exists'}), 409
+    invalidate_calendars([employee.id])
     
     return jsonify({
         'message': 'Employee updated successfully!',
         'employee': {
             'id': employee.id,
+            'location_id': employee.location_id,
             'name': employee.name,
             'email': employee.email,
             'phone': employee.phone,
@@ -124,15 +238,54 @@ def delete_employee(current_user, employee_id):
     if current_user.role != 'admin':
         return jsonify({'message': 'Permission denied!'}), 403
     
-    employee = Employee.query.filter_by(
-        id=employee_id, 
-        business_id=current_user.business_id
-    ).first()
+    employee = scoped(Employee).filter_by(id=employee_id).first()
     
     if not employee:
         return jsonify({'message': 'Employee not found!'}), 404
     
     db.session.delete(employee)
     db.session.commit()
+    invalidate_calendars([employee_id])
     
     return jsonify({'message': 'Employee deleted successfully!'}), 200
+
+def calendar_data(employee):
+    return {
+        'employee_id': employee.id,
+        'calendar_token': employee.calendar_token,
+        'url': url_for('schedule.employee_calendar', token=employee.calendar_token, _external=True)
+    }
+
+@employee_bp.route('/<int:employee_id>/calendar', methods=['GET'])
+@token_required
+def get_employee_calendar(current_user, employee_id):
+    if current_user.role not in ['admin', 'manager']:
+        return jsonify({'message': 'Permission denied!'}), 403
+
+    employee = scoped(Employee).filter_by(id=employee_id).first()
+    if not employee:
+        return jsonify({'message': 'Employee not found!'}), 404
+
+    # Issued on first request
+    if not employee.calendar_token:
+        employee.calendar_token = new_calendar_token()
+        db.session.commit()
+
+    return jsonify({'calendar': calendar_data(employee)}), 200
+
+@employee_bp.route('/<int:employee_id>/calendar/rotate', methods=['POST'])
+@token_required
+def rotate_employee_calendar(current_user, employee_id):
+    if current_user.role not in ['admin', 'manager']:
+        return jsonify({'message': 'Permission denied!'}), 403
+
+    employee = scoped(Employee).filter_by(id=employee_id).first()
+    if not employee:
+        return jsonify({'message': 'Employee not found!'}), 404
+
+    # The old subscription URL stops working immediately
+    employee.calendar_token = new_calendar_token()
+    db.session.commit()
+    invalidate_calendars([employee.id])
+
+    return jsonify({'message': 'Calendar link rotated!', 'calendar': calendar_data(employee)}), 200
@@ -0,0 +1,51 @@
+from flask import Blueprint, jsonify, request
+from src.models.job import Job
+from src.utils.auth_decorators import token_required
+from src.utils.jobs import FINISHED_STATUSES, request_cancel, serialize_job
+from src.utils.pagination import page_args
+from src.utils.tenant import scoped
+
+jobs_bp = Blueprint('jobs', __name__)
+
+@jobs_bp.route('/', methods=['GET'])
+@token_required
+def get_jobs(current_user):
+    page, per_page = page_args()
+    query = scoped(Job)
+    if request.args.get('status'):
+        query = query.filter_by(status=request.args['status'])
+    jobs_paginated = query.order_by(Job.id.desc()).paginate(page=page, per_page=per_page, error_out=False)
+
+    return jsonify({
+        'jobs': [serialize_job(job) for job in jobs_paginated.items],
+        'page': page,
+        'per_page': per_page,
+        'total': jobs_paginated.total
+    }), 200
+
+@jobs_bp.route('/<int:job_id>', methods=['GET'])
+@token_required
+def get_job(current_user, job_id):
+    job = scoped(Job).filter_by(id=job_id).first()
+    if not job:
+        return jsonify({'message': 'Job not found!'}), 404
+
+    response = jsonify({'job': serialize_job(job)})
+    if job.status not in FINISHED_STATUSES:
+        response.headers['Retry-After'] = '2'  # polling hint
+    return response, 200
+
+@jobs_bp.route('/<int:job_id>/cancel', methods=['POST'])
+@token_required
+def cancel_job(current_user, job_id):
+    job = scoped(Job).filter_by(id=job_id).first()
+    if not job:
+        return jsonify({'message': 'Job not found!'}), 404
+    if current_user.role not in ['admin', 'manager'] and job.user_id != current_user.id:
+        return jsonify({'message': 'Permission denied!'}), 403
+    if job.status in FINISHED_STATUSES:
+        return jsonify({'message': f'Job already {job.status}!'}), 409
+
+    request_cancel(job)
+    Job.query.session.refresh(job)
+    return jsonify({'message': 'Cancellation requested!', 'job': serialize_job(job)}), 202
@@ -1,12 +1,50 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from datetime import datetime, timedelta, timezone
+from itertools import groupby
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm.exc import StaleDataError
 from src.models.user import db, Employee
-from src.models.schedule import Shift, ShiftTemplate, TimeOffRequest
-from src.utils.auth import token_required
+from src.models.schedule import Shift, ShiftSwapRequest, ShiftTemplate, TimeOffRequest
+from src.utils.auth_decorators import token_required
+from src.utils.schedule_copy import copy_and_audit, preview_copy
+from src.utils import audit, marketplace
+from src.utils.archive import shift_listing
+from src.utils.ical import calendar_feed, employee_for_token, invalidate_calendars
+from src.utils.compression import etag_matches
+from src.utils.idempotency import idempotent
+from src.utils.jobs import enqueue, job_accepted, wants_async
+from src.utils.locations import LocationError, location_filter, resolve_location
+from src.utils.pagination import page_args
+from src.utils.tenant import scoped
+from src.utils.rate_limit import rate_limited
+from src.utils.projection import FieldsError, format_datetime, format_time, requested_fields, serialize
 
 
 schedule_bp = Blueprint('schedule', __name__)
 
+SHIFT_FIELDS = {
+    'id': None,
+    'location_id': None,
+    'employee_id': None,
+    'employee_name': lambda name: name or 'Unknown',
+    'start_time': format_datetime,
+    'end_time': format_datetime,
+    'role': None,
+    'notes': None,
+    'status': None,
+    'version': None
+}
+
+TEMPLATE_FIELDS = {
+    'id': None,
+    'location_id': None,
+    'name': None,
+    'start_time': format_time,
+    'end_time': format_time,
+    'days_of_week': None,
+    'role': None
+}
+
 def has_permission(user):
     return user.role in ['admin', 'manager']
 
@@ -19,6 +57,10 @@ def parse_datetime(dt_str, fmt='%Y-%m-%d %H:%M:%S'):
     except Exception:
         return None
 
+def if_match_failed(shift):
+    """True when the client sent If-Match for a different shift version (strong comparison)."""
+    return bool(request.if_match) and not etag_matches(request.if_match, str(shift.version))
+
 def parse_time(t_str):
     """Parse time string into a time object."""
     try:
@@ -28,61 +70,131 @@ def parse_time(t_str):
 
 @schedule_bp.route('/shifts', methods=['GET'])
 @token_required
+@rate_limited(cost=5)
 def get_shifts(current_user):
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
     employee_id = request.args.get('employee_id')
-    page = request.args.get('page', default=1, type=int)
-    per_page = request.args.get('per_page', default=50, type=int)
+    page, per_page = page_args()
+    try:
+        fields = requested_fields(SHIFT_FIELDS)
+        location_id = location_filter()
+    except (FieldsError, LocationError) as e:
+        return jsonify({'message': str(e)}), 400
 
-    query = Shift.query.filter_by(business_id=current_user.business_id)
+    start_dt = end_dt = None
 
     if start_date:
         try:
             start_dt = datetime.strptime(start_date, '%Y-%m-%d').replace(tzinfo=timezone.utc)
-            query = query.filter(Shift.start_time >= start_dt)
         except ValueError:
             return jsonify({'message': 'Invalid start_date format! Use YYYY-MM-DD'}), 400
 
     if end_date:
         try:
             end_dt = datetime.strptime(end_date, '%Y-%m-%d').replace(tzinfo=timezone.utc) + timedelta(days=1)
-            query = query.filter(Shift.end_time <= end_dt)
         except ValueError:
             return jsonify({'message': 'Invalid end_date format! Use YYYY-MM-DD'}), 400
 
     if employee_id:
         if not employee_id.isdigit():
             return jsonify({'message': 'Invalid employee_id! Must be integer.'}), 400
-        query = query.filter_by(employee_id=int(employee_id))
+        employee_id = int(employee_id)
+
+    # Hot table, plus archived shifts only when the range reaches them
+    rows = shift_listing(current_user.business_id, start_dt, end_dt, employee_id or None, location_id, fields)
 
     # Pagination
-    shifts_paginated = query.order_by(Shift.start_time).paginate(page=page, per_page=per_page, error_out=False)
-    shifts = shifts_paginated.items
+    total = db.session.query(func.count()).select_from(rows).scalar()
+    shifts = db.session.query(rows).order_by(rows.c.start_time, rows.c.id) \
+        .limit(per_page).offset((page - 1) * per_page).all()
 
-    output = []
-    for shift in shifts:
-        employee = Employee.query.filter_by(id=shift.employee_id).first()
-        shift_data = {
-            'id': shift.id,
-            'employee_id': shift.employee_id,
-            'employee_name': employee.name if employee else 'Unknown',
-            'start_time': shift.start_time.strftime('%Y-%m-%d %H:%M:%S'),
-            'end_time': shift.end_time.strftime('%Y-%m-%d %H:%M:%S'),
-            'role': shift.role,
-            'notes': shift.notes
-        }
-        output.append(shift_data)
+    output = [serialize(shift, fields, SHIFT_FIELDS) for shift in shifts]
 
     return jsonify({
         'shifts': output,
         'page': page,
         'per_page': per_page,
-        'total': shifts_paginated.total
+        'total': total
+    }), 200
+
+@schedule_bp.route('/week', methods=['GET'])
+@token_required
+@rate_limited(cost=5)
+def get_week(current_user):
+    """Week grid: each employee once, with shifts as compact arrays.
+
+    Every shift is ``[id, start, end, role]`` where start/end are minutes
+    from ``week_start`` and role is null when it equals the employee's role.
+    With ``?location_id=`` only that location's shifts are included, for
+    employees based there or working a shift there that week.
+    """
+    try:
+        location_id = location_filter()
+    except LocationError as e:
+        return jsonify({'message': str(e)}), 400
+
+    week_start_arg = request.args.get('week_start')
+    if week_start_arg:
+        try:
+            week_start = datetime.strptime(week_start_arg, '%Y-%m-%d')
+        except ValueError:
+            return jsonify({'message': 'Invalid week_start format! Use YYYY-MM-DD'}), 400
+    else:
+        today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        week_start = today - timedelta(days=today.weekday())
+    week_end = week_start + timedelta(days=7)
+
+    shift_filters = [
+        Shift.employee_id == Employee.id,
+        Shift.business_id == current_user.business_id,
+        Shift.start_time >= week_start,
+        Shift.start_time < week_end
+    ]
+    employee_filters = [Employee.business_id == current_user.business_id]
+    if location_id is not None:
+        shift_filters.append(Shift.location_id == location_id)
+        # Employees based elsewhere still appear when they work here this week
+        employee_filters.append(or_(
+            Employee.location_id == location_id,
+            Employee.id.in_(db.session.query(Shift.employee_id).filter(*shift_filters[1:]))
+        ))
+
+    # One query: every employee, outer-joined to their shifts starting this week
+    rows = db.session.query(
+        Employee.id, Employee.name, Employee.role,
+        Shift.id, Shift.start_time, Shift.end_time, Shift.role
+    ).outerjoin(Shift, and_(*shift_filters)).filter(
+        *employee_filters
+    ).order_by(Employee.name, Employee.id, Shift.start_time).all()
+
+    employees = []
+    shift_count = 0
+    for (employee_id, name, employee_role), group in groupby(rows, key=lambda row: row[:3]):
+        shifts = []
+        for _, _, _, shift_id, start_time, end_time, shift_role in group:
+            if shift_id is None:
+                continue
+            shifts.append([
+                shift_id,
+                int((start_time.replace(tzinfo=None) - week_start).total_seconds() // 60),
+                int((end_time.replace(tzinfo=None) - week_start).total_seconds() // 60),
+                shift_role if shift_role != employee_role else None
+            ])
+        shift_count += len(shifts)
+        employees.append({'id': employee_id, 'name': name, 'role': employee_role, 'shifts': shifts})
+
+    return jsonify({
+        'week_start': week_start.strftime('%Y-%m-%d'),
+        'location_id': location_id,
+        'shift_fields': ['id', 'start', 'end', 'role'],
+        'shift_count': shift_count,
+        'employees': employees
     }), 200
 
 @schedule_bp.route('/shifts', methods=['POST'])
 @token_required
+@idempotent
 def create_shift(current_user):
     if not has_permission(current_user):
         return jsonify({'message': 'Permission denied!'}), 403
@@ -101,10 +213,16 @@ def create_shift(current_user):
     except (ValueError, TypeError):
         return jsonify({'message': 'Invalid employee_id! Must be an integer.'}), 400
 
-    employee = Employee.query.filter_by(id=employee_id, business_id=current_user.business_id).first()
+    employee = scoped(Employee).filter_by(id=employee_id).first()
     if not employee:
         return jsonify({'message': 'Employee not found!'}), 404
 
+    # Defaults to the employee's home location
+    try:
+        location_id = resolve_location(current_user.business_id, data.get('location_id', employee.location_id))
+    except LocationError as e:
+        return jsonify({'message': str(e)}), 400
+
     start_time = parse_datetime(data['start_time'])
     end_time = parse_datetime(data['end_time'])
     if not start_time or not end_time:
@@ -113,6 +231,11 @@ def create_shift(current_user):
     if end_time <= start_time:
         return jsonify({'message': 'End time must be after start time!'}), 400
 
+    # 'open' posts the shift for claiming straight away
+    status = data.get('status', 'assigned')
+    if status not in ('assigned', 'open'):
+        return jsonify({'message': "status must be 'assigned' or 'open'!"}), 400
+
     conflicts = Shift.query.filter_by(employee_id=employee_id).filter(
         Shift.start_time < end_time,
         Shift.end_time > start_time
@@ -123,31 +246,105 @@ def create_shift(current_user):
 
     new_shift = Shift(
         business_id=current_user.business_id,
+        location_id=location_id,
         employee_id=employee_id,
         start_time=start_time,
         end_time=end_time,
         role=data.get('role', employee.role),
-        notes=data.get('notes', '')
+        notes=data.get('notes', ''),
+        status=status
     )
 
     try:
         db.session.add(new_shift)
+        db.session.flush()
+        audit.record_shift_change(new_shift, 'create', current_user.id, audit.snapshot(new_shift))
         db.session.commit()
     except Exception as e:
         db.session.rollback()
         return jsonify({'message': 'Database error: could not create shift.'}), 500
+    invalidate_calendars([employee_id])
 
-    return jsonify({
+    response = jsonify({
         'message': 'Shift created successfully!',
         'shift': {
             'id': new_shift.id,
+            'location_id': new_shift.location_id,
             'employee_id': new_shift.employee_id,
             'employee_name': employee.name,
             'start_time': new_shift.start_time.strftime('%Y-%m-%d %H:%M:%S'),
             'end_time': new_shift.end_time.strftime('%Y-%m-%d %H:%M:%S'),
             'role': new_shift.role,
-            'notes': new_shift.notes
+            'notes': new_shift.notes,
+            'status': new_shift.status,
+            'version': new_shift.version
         }
+    })
+    response.set_etag(str(new_shift.version))
+    return response, 201
+
+@schedule_bp.route('/shifts/copy', methods=['POST'])
+@token_required
+@rate_limited(cost=20)
+def copy_shift_range(current_user):
+    if not has_permission(current_user):
+        return jsonify({'message': 'Permission denied!'}), 403
+
+    data = request.get_json() or {}
+    for field in ('source_start', 'target_start'):
+        if field not in data:
+            return jsonify({'message': f'Missing required field: {field}'}), 400
+
+    try:
+        source_start = datetime.strptime(data['source_start'], '%Y-%m-%d')
+        target_start = datetime.strptime(data['target_start'], '%Y-%m-%d')
+    except (ValueError, TypeError):
+        return jsonify({'message': 'Invalid date format! Use YYYY-MM-DD'}), 400
+
+    if source_start == target_start:
+        return jsonify({'message': 'target_start must differ from source_start!'}), 400
+
+    days = data.get('days', 7)
+    if not isinstance(days, int) or not 1 <= days <= 31:
+        return jsonify({'message': 'days must be an integer between 1 and 31!'}), 400
+
+    employee_ids = data.get('employee_ids') or None
+    if employee_ids is not None and not (isinstance(employee_ids, list) and
+                                         all(isinstance(e, int) for e in employee_ids)):
+        return jsonify({'message': 'employee_ids must be a list of integers!'}), 400
+    roles = data.get('roles') or None
+    if roles is not None and not (isinstance(roles, list) and all(isinstance(r, str) for r in roles)):
+        return jsonify({'message': 'roles must be a list of strings!'}), 400
+    try:
+        location_id = resolve_location(current_user.business_id, data.get('location_id'))
+    except LocationError as e:
+        return jsonify({'message': str(e)}), 400
+
+    if data.get('dry_run'):
+        preview = preview_copy(current_user.business_id, source_start, target_start, days, employee_ids, roles,
+                               location_id)
+        return jsonify({'dry_run': True, **preview}), 200
+
+    # Large tenants: hand the copy to a worker and let the client poll the job
+    if wants_async():
+        return job_accepted(enqueue('copy_week', {
+            'source_start': data['source_start'], 'target_start': data['target_start'], 'days': days,
+            'employee_ids': employee_ids, 'roles': roles, 'location_id': location_id
+        }, current_user.business_id, current_user.id))
+
+    try:
+        created, skipped = copy_and_audit(current_user.business_id, current_user.id, source_start, target_start,
+                                          days, employee_ids, roles, location_id)
+    except Exception:
+        db.session.rollback()
+        return jsonify({'message': 'Database error: could not copy shifts.'}), 500
+    if created:
+        invalidate_calendars(business_id=current_user.business_id)
+
+    return jsonify({
+        'message': 'Shifts copied successfully!',
+        'created': created,
+        'skipped_conflicts': skipped
     }), 201
 
 @schedule_bp.route('/shifts/<int:shift_id>', methods=['PUT'])
@@ -156,11 +353,17 @@ def update_shift(current_user, shift_id):
     if not has_permission(current_user):
         return jsonify({'message': 'Permission denied!'}), 403
 
-    shift = Shift.query.filter_by(id=shift_id, business_id=current_user.business_id).first()
+    shift = scoped(Shift).filter_by(id=shift_id).first()
     if not shift:
         return jsonify({'message': 'Shift not found!'}), 404
 
+    # Fail fast on a stale edit before running any conflict queries
+    if if_match_failed(shift):
+        return jsonify({'message': 'Shift was modified by someone else!', 'version': shift.version}), 412
+
     data = request.get_json()
+    before = audit.snapshot(shift)
+    previous_employee_id = shift.employee_id
 
     if 'employee_id' in data:
         try:
@@ -168,7 +371,7 @@ def update_shift(current_user, shift_id):
         except (ValueError, TypeError):
             return jsonify({'message': 'Invalid employee_id! Must be an integer.'}), 400
 
-        employee = Employee.query.filter_by(id=new_employee_id, business_id=current_user.business_id).first()
+        employee = scoped(Employee).filter_by(id=new_employee_id).first()
         if not employee:
             return jsonify({'message': 'Employee not found!'}), 404
 
@@ -176,8 +379,16 @@ def update_shift(current_user, shift_id):
     else:
         employee = Employee.query.filter_by(id=shift.employee_id).first()
 
-    start_time = shift.start_time
-    end_time = shift.end_time
+    location_id = shift.location_id
+    if 'location_id' in data:
+        try:
+            location_id = resolve_location(current_user.business_id, data['location_id'])
+        except LocationError as e:
+            return jsonify({'message': str(e)}), 400
+
+    # Stored values come back naive; parsed input is UTC-aware
+    start_time = shift.start_time.replace(tzinfo=timezone.utc)
+    end_time = shift.end_time.replace(tzinfo=timezone.utc)
 
     if 'start_time' in data:
         dt = parse_datetime(data['start_time'])
@@ -203,6 +414,7 @@ def update_shift(current_user, shift_id):
     if conflicts:
         return jsonify({'message': 'Shift conflicts with existing shifts!'}), 409
 
+    shift.location_id = location_id
     shift.start_time = start_time
     shift.end_time = end_time
 
@@ -212,24 +424,38 @@ def update_shift(current_user, shift_id):
     if 'notes' in data:
         shift.notes = data['notes']
 
+    changes = audit.diff(before, audit.snapshot(shift))
+    if changes:
+        audit.record_shift_change(shift, 'update', current_user.id, changes)
+
     try:
         db.session.commit()
+    except StaleDataError:
+        # A concurrent update bumped the version between our read and write
+        db.session.rollback()
+        return jsonify({'message': 'Shift was modified by someone else!'}), 412
     except Exception:
         db.session.rollback()
         return jsonify({'message': 'Database error: could not update shift.'}), 500
+    invalidate_calendars([previous_employee_id, shift.employee_id])
 
-    return jsonify({
+    response = jsonify({
         'message': 'Shift updated successfully!',
         'shift': {
             'id': shift.id,
+            'location_id': shift.location_id,
             'employee_id': shift.employee_id,
             'employee_name': employee.name if employee else 'Unknown',
             'start_time': shift.start_time.strftime('%Y-%m-%d %H:%M:%S'),
             'end_time': shift.end_time.strftime('%Y-%m-%d %H:%M:%S'),
             'role': shift.role,
-            'notes': shift.notes
+            'notes': shift.notes,
+            'status': shift.status,
+            'version': shift.version
         }
-    }), 200
+    })
+    response.set_etag(str(shift.version))
+    return response, 200
 
 @schedule_bp.route('/shifts/<int:shift_id>', methods=['DELETE'])
 @token_required
@@ -237,34 +463,328 @@ def delete_shift(current_user, shift_id):
     if not has_permission(current_user):
         return jsonify({'message': 'Permission denied!'}), 403
 
-    shift = Shift.query.filter_by(id=shift_id, business_id=current_user.business_id).first()
+    shift = scoped(Shift).filter_by(id=shift_id).first()
     if not shift:
         return jsonify({'message': 'Shift not found!'}), 404
 
+    if if_match_failed(shift):
+        return jsonify({'message': 'Shift was modified by someone else!', 'version': shift.version}), 412
+
+    employee_id = shift.employee_id
     try:
+        audit.record_shift_change(shift, 'delete', current_user.id, audit.snapshot(shift))
         db.session.delete(shift)
         db.session.commit()
+    except StaleDataError:
+        db.session.rollback()
+        return jsonify({'message': 'Shift was modified by someone else!'}), 412
     except Exception:
         db.session.rollback()
         return jsonify({'message': 'Database error: could not delete shift.'}), 500
+    invalidate_calendars([employee_id])
 
     return jsonify({'message': 'Shift deleted successfully!'}), 200
 
+@schedule_bp.route('/calendar/<token>.ics', methods=['GET'])
+def employee_calendar(token):
+    """Subscription feed of one employee's shifts; the URL token is the credential."""
+    employee = employee_for_token(token)
+    if not employee:
+        return jsonify({'message': 'Calendar not found!'}), 404
+
+    etag, last_modified, body = calendar_feed(employee)
+
+    # Calendar apps poll every few minutes; answer unchanged feeds with 304
+    if request.if_none_match:
+        not_modified = etag_matches(request.if_none_match, etag, weak=True)
+    else:
+        not_modified = bool(request.if_modified_since and last_modified
+                            and last_modified.replace(microsecond=0, tzinfo=timezone.utc) <= request.if_modified_since)
+
+    if not_modified:
+        response = Response(status=304)
+    else:
+        if not isinstance(body, bytes):
+            body = stream_with_context(body)
+        response = Response(body, mimetype='text/calendar')
+        response.headers['Content-Disposition'] = 'inline; filename="shifts.ics"'
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified.replace(tzinfo=timezone.utc)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+def acting_employee(current_user, employee_id=None):
+    """The employee a request acts for: the user's own record (matched by
+    email), or any employee of the business when a manager names one."""
+    if employee_id is not None and has_permission(current_user):
+        return scoped(Employee).filter_by(id=employee_id).first()
+    return scoped(Employee).filter_by(email=current_user.email).first()
+
+def swap_data(swap):
+    return {
+        'id': swap.id,
+        'shift_id': swap.shift_id,
+        'requester_employee_id': swap.requester_employee_id,
+        'target_employee_id': swap.target_employee_id,
+        'target_shift_id': swap.target_shift_id,
+        'status': swap.status,
+        'created_at': swap.created_at.strftime('%Y-%m-%d %H:%M:%S')
+    }
+
+@schedule_bp.route('/shifts/open', methods=['GET'])
+@token_required
+@rate_limited(cost=2)
+def get_open_shifts(current_user):
+    page, per_page = page_args()
+    try:
+        location_id = location_filter()
+    except LocationError as e:
+        return jsonify({'message': str(e)}), 400
+
+    query = Shift.query.filter(
+        Shift.business_id == current_user.business_id,
+        Shift.status == 'open',
+        Shift.start_time >= datetime.utcnow()
+    )
+    if location_id is not None:
+        query = query.filter(Shift.location_id == location_id)
+    shifts_paginated = query.order_by(Shift.start_time, Shift.id).paginate(page=page, per_page=per_page, error_out=False)
+
+    return jsonify({
+        'shifts': [serialize(shift, [f for f in SHIFT_FIELDS if f != 'employee_name'], SHIFT_FIELDS)
+                   for shift in shifts_paginated.items],
+        'page': page,
+        'per_page': per_page,
+        'total': shifts_paginated.total
+    }), 200
+
+@schedule_bp.route('/shifts/<int:shift_id>/open', methods=['POST', 'DELETE'])
+@token_required
+def set_shift_open(current_user, shift_id):
+    """POST offers the shift up for claiming; DELETE withdraws the offer."""
+    shift = scoped(Shift).filter_by(id=shift_id).first()
+    if not shift:
+        return jsonify({'message': 'Shift not found!'}), 404
+
+    employee = acting_employee(current_user)
+    if not has_permission(current_user) and (not employee or employee.id != shift.employee_id):
+        return jsonify({'message': 'Permission denied!'}), 403
+
+    if if_match_failed(shift):
+        return jsonify({'message': 'Shift was modified by someone else!', 'version': shift.version}), 412
+
+    status = 'open' if request.method == 'POST' else 'assigned'
+    if shift.status == status:
+        return jsonify({'message': f'Shift is already {status}!'}), 409
+
+    before = audit.snapshot(shift)
+    shift.status = status
+    try:
+        audit.record_shift_change(shift, 'open' if status == 'open' else 'withdraw', current_user.id,
+                                  audit.diff(before, audit.snapshot(shift)))
+        db.session.commit()
+    except StaleDataError:
+        db.session.rollback()
+        return jsonify({'message': 'Shift was modified by someone else!'}), 412
+
+    response = jsonify({'message': f'Shift is now {status}!', 'shift_id': shift.id, 'status': shift.status,
+                        'version': shift.version})
+    response.set_etag(str(shift.version))
+    return response, 200
+
+@schedule_bp.route('/shifts/<int:shift_id>/claim', methods=['POST'])
+@token_required
+def claim_open_shift(current_user, shift_id):
+    data = request.get_json(silent=True) or {}
+    employee = acting_employee(current_user, data.get('employee_id'))
+    if not employee:
+        return jsonify({'message': 'Employee not found!'}), 404
+
+    shift = scoped(Shift).filter_by(id=shift_id).first()
+    if not shift:
+        return jsonify({'message': 'Shift not found!'}), 404
+    if shift.status != 'open':
+        return jsonify({'message': 'Shift is no longer open!'}), 409
+    if shift.employee_id == employee.id:
+        return jsonify({'message': 'You already hold this shift!'}), 400
+
+    previous_employee_id = shift.employee_id
+    try:
+        # The UPDATE itself decides the winner; no lock is held between read and write
+        if not marketplace.claim_shift(shift, employee.id):
+            db.session.rollback()
+            if marketplace.has_conflict(shift, employee.id):
+                return jsonify({'message': 'Shift conflicts with your existing shifts or time off!'}), 409
+            return jsonify({'message': 'Shift is no longer open!'}), 409
+        db.session.refresh(shift)
+        audit.record_shift_change(shift, 'claim', current_user.id, {
+            'employee_id': [previous_employee_id, employee.id], 'status': ['open', 'assigned']})
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        return jsonify({'message': 'Database error: could not claim shift.'}), 500
+    invalidate_calendars([previous_employee_id, employee.id])
+
+    response = jsonify({
+        'message': 'Shift claimed successfully!',
+        'shift': serialize(shift, [f for f in SHIFT_FIELDS if f != 'employee_name'], SHIFT_FIELDS)
+    })
+    response.set_etag(str(shift.version))
+    return response, 200
+
+@schedule_bp.route('/shifts/<int:shift_id>/swaps', methods=['POST'])
+@token_required
+def create_swap_request(current_user, shift_id):
+    shift = scoped(Shift).filter_by(id=shift_id).first()
+    if not shift:
+        return jsonify({'message': 'Shift not found!'}), 404
+
+    employee = acting_employee(current_user)
+    if not has_permission(current_user) and (not employee or employee.id != shift.employee_id):
+        return jsonify({'message': 'Permission denied!'}), 403
+
+    data = request.get_json() or {}
+    if 'target_employee_id' not in data:
+        return jsonify({'message': 'Missing required field: target_employee_id'}), 400
+    try:
+        target_employee_id = int(data['target_employee_id'])
+        target_shift_id = int(data['target_shift_id']) if data.get('target_shift_id') is not None else None
+    except (ValueError, TypeError):
+        return jsonify({'message': 'Invalid target_employee_id or target_shift_id! Must be integers.'}), 400
+
+    if target_employee_id == shift.employee_id:
+        return jsonify({'message': 'Cannot swap a shift with its own employee!'}), 400
+    if not scoped(Employee).filter_by(id=target_employee_id).first():
+        return jsonify({'message': 'Employee not found!'}), 404
+    if target_shift_id is not None and not scoped(Shift).filter_by(
+            id=target_shift_id, employee_id=target_employee_id).first():
+        return jsonify({'message': 'Target shift not found for that employee!'}), 404
+
+    swap = ShiftSwapRequest(
+        business_id=current_user.business_id,
+        shift_id=shift.id,
+        requester_employee_id=shift.employee_id,
+        target_employee_id=target_employee_id,
+        target_shift_id=target_shift_id,
+        created_by=current_user.id
+    )
+    db.session.add(swap)
+    db.session.commit()
+
+    return jsonify({'message': 'Swap requested!', 'swap': swap_data(swap)}), 201
+
+@schedule_bp.route('/swaps', methods=['GET'])
+@token_required
+def get_swap_requests(current_user):
+    page, per_page = page_args()
+    query = scoped(ShiftSwapRequest).filter_by(status=request.args.get('status', 'pending'))
+    employee_id = request.args.get('employee_id', type=int)
+    if employee_id is not None:
+        query = query.filter(or_(ShiftSwapRequest.requester_employee_id == employee_id,
+                                 ShiftSwapRequest.target_employee_id == employee_id))
+    swaps_paginated = query.order_by(ShiftSwapRequest.id.desc()).paginate(page=page, per_page=per_page, error_out=False)
+
+    return jsonify({
+        'swaps': [swap_data(swap) for swap in swaps_paginated.items],
+        'page': page,
+        'per_page': per_page,
+        'total': swaps_paginated.total
+    }), 200
+
+@schedule_bp.route('/swaps/<int:swap_id>/<action>', methods=['POST'])
+@token_required
+def respond_to_swap(current_user, swap_id, action):
+    """accept or decline (target employee or a manager); cancel (requester or a manager)."""
+    if action not in ('accept', 'decline', 'cancel'):
+        return jsonify({'message': 'Unknown swap action!'}), 404
+
+    swap = scoped(ShiftSwapRequest).filter_by(id=swap_id).first()
+    if not swap:
+        return jsonify({'message': 'Swap request not found!'}), 404
+
+    employee = acting_employee(current_user)
+    party = swap.requester_employee_id if action == 'cancel' else swap.target_employee_id
+    if not has_permission(current_user) and (not employee or employee.id != party):
+        return jsonify({'message': 'Permission denied!'}), 403
+
+    if action != 'accept':
+        if not marketplace.set_swap_status(swap, 'declined' if action == 'decline' else 'cancelled'):
+            db.session.rollback()
+            return jsonify({'message': 'Swap request is no longer pending!'}), 409
+        db.session.commit()
+        db.session.refresh(swap)
+        return jsonify({'message': f'Swap request {swap.status}!', 'swap': swap_data(swap)}), 200
+
+    try:
+        if not marketplace.accept_swap(swap):
+            db.session.rollback()
+            return jsonify({'message': 'Swap is no longer possible: it was answered already, a shift changed '
+                                       'hands, or it conflicts with existing shifts or time off!'}), 409
+        for shift_id, old, new in ((swap.shift_id, swap.requester_employee_id, swap.target_employee_id),
+                                   (swap.target_shift_id, swap.target_employee_id, swap.requester_employee_id)):
+            if shift_id is not None:
+                audit.record_shift_change(db.session.get(Shift, shift_id, populate_existing=True), 'swap',
+                                          current_user.id, {'employee_id': [old, new]})
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        return jsonify({'message': 'Database error: could not accept swap.'}), 500
+    invalidate_calendars([swap.requester_employee_id, swap.target_employee_id])
+
+    db.session.refresh(swap)
+    return jsonify({'message': 'Swap accepted!', 'swap': swap_data(swap)}), 200
+
+@schedule_bp.route('/shifts/<int:shift_id>/history', methods=['GET'])
+@token_required
+def get_shift_history(current_user, shift_id):
+    changes = audit.shift_history(current_user.business_id, shift_id)
+    if not changes:
+        return jsonify({'message': 'No history for this shift!'}), 404
+
+    return jsonify({'shift_id': shift_id, 'history': [audit.serialize_change(c) for c in changes]}), 200
+
+@schedule_bp.route('/employees/<int:employee_id>/shift-history', methods=['GET'])
+@token_required
+@rate_limited(cost=2)
+def get_employee_shift_history(current_user, employee_id):
+    start_date = request.args.get('start_date')
+    end_date = request.args.get('end_date')
+    page, per_page = page_args()
+
+    try:
+        start = datetime.strptime(start_date, '%Y-%m-%d') if start_date else None
+        end = datetime.strptime(end_date, '%Y-%m-%d') + timedelta(days=1) if end_date else None
+    except ValueError:
+        return jsonify({'message': 'Invalid date format! Use YYYY-MM-DD'}), 400
+
+    changes_paginated = audit.employee_history_query(current_user.business_id, employee_id, start, end) \
+        .paginate(page=page, per_page=per_page, error_out=False)
+
+    return jsonify({
+        'employee_id': employee_id,
+        'history': [audit.serialize_change(c) for c in changes_paginated.items],
+        'page': page,
+        'per_page': per_page,
+        'total': changes_paginated.total
+    }), 200
+
 @schedule_bp.route('/shift-types', methods=['GET'])
 @token_required
 def get_shift_templates(current_user):
-    templates = ShiftTemplate.query.filter_by(business_id=current_user.business_id).all()
-    output = []
-    for template in templates:
-        template_data = {
-            'id': template.id,
-            'name': template.name,
-            'start_time': template.start_time.strftime('%H:%M:%S'),
-            'end_time': template.end_time.strftime('%H:%M:%S'),
-            'days_of_week': template.days_of_week,
-            'role': template.role
-        }
-        output.append(template_data)
+    try:
+        fields = requested_fields(TEMPLATE_FIELDS)
+        location_id = location_filter()
+    except (FieldsError, LocationError) as e:
+        return jsonify({'message': str(e)}), 400
+
+    query = scoped(ShiftTemplate).with_entities(*[getattr(ShiftTemplate, f) for f in fields])
+    if location_id is not None:
+        # Business-wide templates (no location) apply everywhere
+        query = query.filter(or_(ShiftTemplate.location_id == location_id, ShiftTemplate.location_id.is_(None)))
+    templates = query.all()
+    output = [serialize(template, fields, TEMPLATE_FIELDS) for template in templates]
 
     return jsonify({'shift_types': output}), 200
 
@@ -285,8 +805,14 @@ def create_shift_template(current_user):
     if not start_time or not end_time:
         return jsonify({'message': 'Invalid time format! Use HH:MM:SS'}), 400
 
+    try:
+        location_id = resolve_location(current_user.business_id, data.get('location_id'))
+    except LocationError as e:
+        return jsonify({'message': str(e)}), 400
+
     new_template = ShiftTemplate(
         business_id=current_user.business_id,
+        location_id=location_id,
         name=data['name'],
         start_time=start_time,
         end_time=end_time,
@@ -305,6 +831,7 @@ def create_shift_template(current_user):
         'message': 'Shift type created successfully!',
         'shift_type': {
             'id': new_template.id,
+            'location_id': new_template.location_id,
             'name': new_template.name,
             'start_time': new_template.start_time.strftime('%H:%M:%S'),
             'end_time': new_template.end_time.strftime('%H:%M:%S'),
@@ -1,79 +1,125 @@
 from flask import Blueprint, jsonify, request
+from sqlalchemy.exc import IntegrityError
 from src.models.user import User, db
+from src.utils.auth_decorators import token_required
+from src.utils.pagination import page_args
+from src.utils.tenant import scoped
 
 user_bp = Blueprint('user', __name__)
 
+USER_ROLES = ('admin', 'manager', 'employee')
+
 @user_bp.route('/users', methods=['GET'])
-def get_users():
-    users = User.query.all()
-    return jsonify([user.to_dict() for user in users]), 200
+@token_required
+def get_users(current_user):
+    page, per_page = page_args()
+    users_paginated = scoped(User).order_by(User.id).paginate(page=page, per_page=per_page, error_out=False)
+
+    return jsonify({
+        'users': [user.to_dict() for user in users_paginated.items],
+        'page': page,
+        'per_page': per_page,
+        'total': users_paginated.total
+    }), 200
 
 @user_bp.route('/users', methods=['POST'])
-def create_user():
+@token_required
+def create_user(current_user):
+    if current_user.role not in ['admin', 'manager']:
+        return jsonify({'message': 'Permission denied!'}), 403
+
     data = request.get_json()
     if not data or 'name' not in data or 'email' not in data or 'password' not in data:
         return jsonify({'message': 'Missing required fields: name, email, or password'}), 400
-    
+
+    role = data.get('role', 'manager')
+    if role not in USER_ROLES:
+        return jsonify({'message': f'role must be one of: {", ".join(USER_ROLES)}'}), 400
+    if role == 'admin' and current_user.role != 'admin':
+        return jsonify({'message': 'Only admins can create admins!'}), 403
+
     # Check if email already exists
     if User.query.filter_by(email=data['email']).first():
         return jsonify({'message': 'User with this email already exists'}), 409
-    
-    business_id = data.get('business_id')
-    if not business_id:
-        return jsonify({'message': 'business_id is required'}), 400
-    
+
+    # Always the caller's business; a business_id in the body is ignored
     user = User(
         name=data['name'],
         email=data['email'],
-        business_id=business_id,
-        role=data.get('role', 'manager')
+        business_id=current_user.business_id,
+        role=role
     )
     user.set_password(data['password'])
 
     try:
         db.session.add(user)
         db.session.commit()
-    except Exception as e:
+    except IntegrityError:
         db.session.rollback()
-        return jsonify({'message': 'Failed to create user', 'error': str(e)}), 500
-    
+        return jsonify({'message': 'User with this email already exists'}), 409
+
     return jsonify(user.to_dict()), 201
 
 @user_bp.route('/users/<int:user_id>', methods=['GET'])
-def get_user(user_id):
-    user = User.query.get_or_404(user_id)
+@token_required
+def get_user(current_user, user_id):
+    user = scoped(User).filter_by(id=user_id).first()
+    if not user:
+        return jsonify({'message': 'User not found!'}), 404
     return jsonify(user.to_dict()), 200
 
 @user_bp.route('/users/<int:user_id>', methods=['PUT'])
-def update_user(user_id):
-    user = User.query.get_or_404(user_id)
+@token_required
+def update_user(current_user, user_id):
+    if current_user.role != 'admin' and current_user.id != user_id:
+        return jsonify({'message': 'Permission denied!'}), 403
+
+    user = scoped(User).filter_by(id=user_id).first()
+    if not user:
+        return jsonify({'message': 'User not found!'}), 404
+
     data = request.get_json()
     if not data:
         return jsonify({'message': 'No data provided'}), 400
-    
+
+    if 'role' in data and data['role'] != user.role:
+        if current_user.role != 'admin':
+            return jsonify({'message': 'Only admins can change roles!'}), 403
+        if data['role'] not in USER_ROLES:
+            return jsonify({'message': f'role must be one of: {", ".join(USER_ROLES)}'}), 400
+        user.role = data['role']
+
+    if 'email' in data and data['email'] != user.email:
+        if User.query.filter_by(email=data['email']).first():
+            return jsonify({'message': 'User with this email already exists'}), 409
+        user.email = data['email']
+
     user.name = data.get('name', user.name)
-    user.email = data.get('email', user.email)
     if 'password' in data:
         user.set_password(data['password'])
-    user.role = data.get('role', user.role)
-    user.business_id = data.get('business_id', user.business_id)
-    
+    # business_id is not editable: users cannot be moved between tenants
+
     try:
         db.session.commit()
-    except Exception as e:
+    except IntegrityError:
         db.session.rollback()
-        return jsonify({'message': 'Failed to update user', 'error': str(e)}), 500
-    
+        return jsonify({'message': 'User with this email already exists'}), 409
+
     return jsonify(user.to_dict()), 200
 
 @user_bp.route('/users/<int:user_id>', methods=['DELETE'])
-def delete_user(user_id):
-    user = User.query.get_or_404(user_id)
-    try:
-        db.session.delete(user)
-        db.session.commit()
-    except Exception as e:
-        db.session.rollback()
-        return jsonify({'message': 'Failed to delete user', 'error': str(e)}), 500
-    
+@token_required
+def delete_user(current_user, user_id):
+    if current_user.role != 'admin':
+        return jsonify({'message': 'Permission denied!'}), 403
+    if current_user.id == user_id:
+        return jsonify({'message': 'You cannot delete yourself!'}), 400
+
+    user = scoped(User).filter_by(id=user_id).first()
+    if not user:
+        return jsonify({'message': 'User not found!'}), 404
+
+    db.session.delete(user)
+    db.session.commit()
+
     return '', 204
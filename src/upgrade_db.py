@@ -0,0 +1,140 @@
+"""Bring an existing database up to date with the models.
+
+    python -m src.upgrade_db
+
+``db.create_all()`` only creates missing tables and never alters one that
+already exists, so columns and indexes added to a model since its table
+was created are missing from older databases. This adds them, makes
+indexes unique where the model now requires it, and on SQLite rebuilds
+``shifts`` with AUTOINCREMENT so archived shift ids are never reused. It is safe to run repeatedly; run it once before starting
+the web and worker processes after an upgrade.
+"""
+import argparse
+
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.schema import AddConstraint, CreateColumn, CreateIndex, CreateTable, DropIndex
+
+
+def add_missing_columns(conn, metadata):
+    """ALTER TABLE ... ADD COLUMN for model columns the database lacks."""
+    inspector = inspect(conn)
+    existing_tables = set(inspector.get_table_names())
+    added = []
+    for table in metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        present = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in present:
+                continue
+            if not column.nullable and column.server_default is None:
+                raise RuntimeError(f'{table.name}.{column.name} is NOT NULL without a server default; '
+                                   f'it cannot be added to a table that has rows.')
+            ddl = CreateColumn(column).compile(dialect=conn.dialect)
+            conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {ddl}'))
+            if column.unique:
+                conn.execute(text(f'CREATE UNIQUE INDEX uq_{table.name}_{column.name} '
+                                  f'ON {table.name} ({column.name})'))
+            # SQLite cannot add a constraint to an existing table
+            if conn.dialect.name != 'sqlite':
+                for foreign_key in column.foreign_keys:
+                    conn.execute(AddConstraint(foreign_key.constraint))
+            added.append(f'{table.name}.{column.name}')
+    return added
+
+
+def _indexes(conn, inspector, table_name):
+    """Map each index name on the table to whether it is unique."""
+    if conn.dialect.name == 'sqlite':
+        # SQLite reflection skips expression indexes such as lower(email)
+        rows = conn.execute(text("SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = :name"),
+                            {'name': table_name})
+        return {name: sql is None or sql.upper().startswith('CREATE UNIQUE') for name, sql in rows}
+    return {index['name']: bool(index['unique']) for index in inspector.get_indexes(table_name)}
+
+
+def add_missing_indexes(conn, metadata):
+    """Create missing indexes, and recreate ones the model has since made unique."""
+    inspector = inspect(conn)
+    existing_tables = set(inspector.get_table_names())
+    added = []
+    for table in metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        present = _indexes(conn, inspector, table.name)
+        for index in table.indexes:
+            if index.name in present and (present[index.name] or not index.unique):
+                continue
+            if index.name in present:
+                conn.execute(DropIndex(index))
+            try:
+                conn.execute(CreateIndex(index))
+            except IntegrityError:
+                raise RuntimeError(f'{index.name} cannot be created: {table.name} has rows that '
+                                   f'duplicate its unique key. Resolve them and run the upgrade again.')
+            added.append(index.name)
+    return added
+
+
+def rebuild_with_autoincrement(conn, table, floor_query=None):
+    """Recreate a SQLite table with AUTOINCREMENT, keeping its rows and indexes.
+
+    The sequence starts above ``floor_query`` (e.g. the highest archived
+    id) as well as the table's own ids. Returns False if the table is
+    already declared with AUTOINCREMENT.
+    """
+    sql = conn.execute(text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                       {'name': table.name}).scalar()
+    if sql is None or 'AUTOINCREMENT' in sql.upper():
+        return False
+
+    staging = f'{table.name}_rebuild'
+    present = {column['name'] for column in inspect(conn).get_columns(table.name)}
+    columns = ', '.join(column.name for column in table.columns if column.name in present)
+
+    create = str(CreateTable(table).compile(dialect=conn.dialect))
+    conn.execute(text(create.replace(f'CREATE TABLE {table.name} ', f'CREATE TABLE {staging} ', 1)))
+    conn.execute(text(f'INSERT INTO {staging} ({columns}) SELECT {columns} FROM {table.name}'))
+    conn.execute(text(f'DROP TABLE {table.name}'))
+    conn.execute(text(f'ALTER TABLE {staging} RENAME TO {table.name}'))
+    for index in table.indexes:
+        conn.execute(CreateIndex(index))
+
+    floor = conn.execute(text(floor_query)).scalar() if floor_query else None
+    if floor:
+        conn.execute(text('DELETE FROM sqlite_sequence WHERE name = :name'), {'name': table.name})
+        conn.execute(text('INSERT INTO sqlite_sequence (name, seq) '
+                          f'SELECT :name, max(coalesce(max(id), 0), :floor) FROM {table.name}'),
+                     {'name': table.name, 'floor': floor})
+    return True
+
+
+def upgrade(engine, metadata):
+    with engine.begin() as conn:
+        columns = add_missing_columns(conn, metadata)
+        rebuilt = []
+        if conn.dialect.name == 'sqlite':
+            shifts = metadata.tables['shifts']
+            if rebuild_with_autoincrement(conn, shifts, 'SELECT max(id) FROM shifts_archive'):
+                rebuilt.append(shifts.name)
+        indexes = add_missing_indexes(conn, metadata)
+    return columns, rebuilt, indexes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.parse_args(argv)
+
+    from src.main import create_app
+    from src.extensions import db
+
+    app = create_app()  # creates any missing tables first
+    with app.app_context():
+        columns, rebuilt, indexes = upgrade(db.engine, db.metadata)
+    print(f'Added {len(columns)} columns ({", ".join(columns) or "none"}), '
+          f'rebuilt {", ".join(rebuilt) or "no tables"}, added {len(indexes)} indexes.')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+from datetime import datetime
+
+from sqlalchemy import func, insert, literal, select, union_all
+
+from src.extensions import db
+from src.models.schedule import ArchivedShift, Shift
+from src.models.user import Employee
+
+ARCHIVED_COLUMNS = ('id', 'business_id', 'location_id', 'employee_id', 'start_time', 'end_time', 'role', 'notes',
+                    'status', 'created_at', 'updated_at', 'version')
+
+
+def archive_shifts(before, batch_size=1000, progress=None):
+    """Move shifts that ended before ``before`` into ``shifts_archive``.
+
+    Each batch is copied and deleted in its own transaction so the hot
+    table is never locked for long. Returns the number of shifts moved.
+    """
+    moved = 0
+    while True:
+        ids = [row[0] for row in db.session.query(Shift.id)
+               .filter(Shift.end_time < before).order_by(Shift.id).limit(batch_size)]
+        if not ids:
+            return moved
+
+        now = datetime.utcnow()
+        source = select(*[getattr(Shift, name) for name in ARCHIVED_COLUMNS], literal(now, db.DateTime)) \
+            .where(Shift.id.in_(ids))
+        db.session.execute(insert(ArchivedShift).from_select(list(ARCHIVED_COLUMNS) + ['archived_at'], source))
+        Shift.query.filter(Shift.id.in_(ids)).delete(synchronize_session=False)
+        db.session.commit()
+
+        moved += len(ids)
+        if progress:
+            progress(moved)
+
+
+def archive_needed(business_id, start=None):
+    """True when a range starting at ``start`` (None = unbounded) reaches archived shifts."""
+    latest = db.session.query(func.max(ArchivedShift.start_time)) \
+        .filter(ArchivedShift.business_id == business_id).scalar()
+    if latest is None:
+        return False
+    return start is None or start.replace(tzinfo=None) <= latest
+
+
+LISTING_FIELDS = ('id', 'location_id', 'employee_id', 'employee_name', 'start_time', 'end_time', 'role', 'notes',
+                  'status', 'version')
+
+
+def _shift_select(model, business_id, start, end, employee_id, location_id, fields):
+    columns = [Employee.name.label('employee_name') if name == 'employee_name' else getattr(model, name)
+               for name in fields]
+    query = select(*columns).select_from(model).where(model.business_id == business_id)
+    if location_id is not None:
+        query = query.where(model.location_id == location_id)
+    if 'employee_name' in fields:
+        query = query.outerjoin(Employee, Employee.id == model.employee_id)
+    if start is not None:
+        query = query.where(model.start_time >= start)
+    if end is not None:
+        query = query.where(model.end_time <= end)
+    if employee_id is not None:
+        query = query.where(model.employee_id == employee_id)
+    return query
+
+
+def shift_listing(business_id, start=None, end=None, employee_id=None, location_id=None, fields=LISTING_FIELDS):
+    """Shift rows for a range, reading the archive only when needed.
+
+    Returns a subquery with the requested ``fields`` (any of
+    LISTING_FIELDS, always including ``id`` and ``start_time`` for
+    ordering) for the caller to count, order and page. The employee join
+    is only added when ``employee_name`` is requested.
+    """
+    fields = list(dict.fromkeys(list(fields) + ['id', 'start_time']))
+    query = _shift_select(Shift, business_id, start, end, employee_id, location_id, fields)
+    if archive_needed(business_id, start):
+        query = union_all(query, _shift_select(ArchivedShift, business_id, start, end, employee_id, location_id, fields))
+    return query.subquery()
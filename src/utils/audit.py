@@ -0,0 +1,182 @@
+import json
+from datetime import datetime
+
+from sqlalchemy import insert, literal, select
+
+from src.extensions import db
+from src.models.schedule import Shift, ShiftChange
+
+AUDITED_FIELDS = ('location_id', 'employee_id', 'start_time', 'end_time', 'role', 'notes', 'status')
+DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def _month(moment):
+    return moment.year * 100 + moment.month
+
+
+def _value(value):
+    if isinstance(value, datetime):
+        return value.strftime(DATETIME_FORMAT)
+    return value
+
+
+def _dumps(data):
+    return json.dumps(data, separators=(',', ':'), sort_keys=True)
+
+
+def snapshot(shift):
+    return {field: _value(getattr(shift, field)) for field in AUDITED_FIELDS}
+
+
+def diff(before, after):
+    """Changed fields only, as ``{field: [old, new]}``."""
+    return {field: [before[field], after[field]] for field in AUDITED_FIELDS if before[field] != after[field]}
+
+
+def record_shift_change(shift, action, user_id, changes):
+    """Queue a change record on the current session; it commits with the shift write."""
+    now = datetime.utcnow()
+    db.session.add(ShiftChange(
+        business_id=shift.business_id,
+        shift_id=shift.id,
+        employee_id=shift.employee_id,
+        user_id=user_id,
+        action=action,
+        changes=_dumps(changes),
+        month=_month(now),
+        created_at=now
+    ))
+
+
+def record_copied_shifts(business_id, user_id, copy_batch, source_start):
+    """Log every shift created by the copy ``copy_batch`` with one INSERT ... SELECT."""
+    now = datetime.utcnow()
+    source = select(
+        Shift.business_id, Shift.id, Shift.employee_id, literal(user_id, db.Integer), literal('copy', db.String),
+        literal(_dumps({'copied_from': source_start.strftime('%Y-%m-%d')}), db.Text),
+        literal(_month(now), db.Integer), literal(now, db.DateTime)
+    ).where(Shift.business_id == business_id, Shift.copy_batch == copy_batch)
+    db.session.execute(insert(ShiftChange).from_select(
+        ['business_id', 'shift_id', 'employee_id', 'user_id', 'action', 'changes', 'month', 'created_at'],
+        source
+    ))
+
+
+def record_location_removed(business_id, user_id, location_id):
+    """Log the detach of every shift at a deleted location with one INSERT ... SELECT.
+
+    Run it before the UPDATE that clears ``location_id``.
+    """
+    now = datetime.utcnow()
+    source = select(
+        Shift.business_id, Shift.id, Shift.employee_id, literal(user_id, db.Integer), literal('update', db.String),
+        literal(_dumps({'location_id': [location_id, None]}), db.Text),
+        literal(_month(now), db.Integer), literal(now, db.DateTime)
+    ).where(Shift.business_id == business_id, Shift.location_id == location_id)
+    db.session.execute(insert(ShiftChange).from_select(
+        ['business_id', 'shift_id', 'employee_id', 'user_id', 'action', 'changes', 'month', 'created_at'],
+        source
+    ))
+
+
+def serialize_change(change):
+    return {
+        'id': change.id,
+        'shift_id': change.shift_id,
+        'employee_id': change.employee_id,
+        'user_id': change.user_id,
+        'action': change.action,
+        'changes': json.loads(change.changes) if change.changes else {},
+        'created_at': change.created_at.strftime(DATETIME_FORMAT)
+    }
+
+
+def shift_history(business_id, shift_id):
+    return ShiftChange.query.filter_by(business_id=business_id, shift_id=shift_id) \
+        .order_by(ShiftChange.id).all()
+
+
+def employee_history_query(business_id, employee_id, start=None, end=None):
+    query = ShiftChange.query.filter_by(business_id=business_id, employee_id=employee_id)
+    if start:
+        query = query.filter(ShiftChange.month >= _month(start), ShiftChange.created_at >= start)
+    if end:
+        query = query.filter(ShiftChange.month <= _month(end), ShiftChange.created_at < end)
+    return query.order_by(ShiftChange.id.desc())
+
+
+def _merge(changes):
+    """Fold a sequence of update diffs into one: first old value, last new value."""
+    merged = {}
+    for change in changes:
+        for field, (old, new) in change.items():
+            merged[field] = [merged[field][0] if field in merged else old, new]
+    return {field: values for field, values in merged.items() if values[0] != values[1]}
+
+
+def _runs(records):
+    """Split records into runs of consecutive edits by the same user."""
+    runs = []
+    for record in records:
+        if runs and runs[-1][-1].user_id == record.user_id:
+            runs[-1].append(record)
+        else:
+            runs.append([record])
+    return runs
+
+
+def compact_month(month, batch_size=1000):
+    """Collapse consecutive update records of a shift by the same user into one 'compact' row.
+
+    The kept row is the last of each run, so every remaining record still
+    names who made the edits and when the last of them happened. Create,
+    delete and copy records are kept as-is. Returns the number of rows
+    removed.
+    """
+    removed = 0
+    last_shift_id = 0
+    while True:
+        shift_ids = [row[0] for row in db.session.query(ShiftChange.shift_id).filter(
+            ShiftChange.month == month,
+            ShiftChange.action.in_(('update', 'compact')),
+            ShiftChange.shift_id > last_shift_id
+        ).group_by(ShiftChange.shift_id).having(db.func.count() > 1)
+            .order_by(ShiftChange.shift_id).limit(batch_size)]
+        if not shift_ids:
+            return removed
+
+        records = ShiftChange.query.filter(
+            ShiftChange.month == month,
+            ShiftChange.action.in_(('update', 'compact')),
+            ShiftChange.shift_id.in_(shift_ids)
+        ).order_by(ShiftChange.shift_id, ShiftChange.id).all()
+
+        by_shift = {}
+        for record in records:
+            by_shift.setdefault(record.shift_id, []).append(record)
+        for group in by_shift.values():
+            for run in _runs(group):
+                if len(run) < 2:
+                    continue
+                keeper = run[-1]
+                keeper.changes = _dumps(_merge(json.loads(r.changes) for r in run))
+                keeper.action = 'compact'
+                for record in run[:-1]:
+                    db.session.delete(record)
+                    removed += 1
+
+        db.session.commit()
+        last_shift_id = shift_ids[-1]
+
+
+def purge_before(month, batch_size=5000):
+    """Delete change records older than ``month`` (YYYYMM) in batches."""
+    removed = 0
+    while True:
+        ids = [row[0] for row in db.session.query(ShiftChange.id)
+               .filter(ShiftChange.month < month).limit(batch_size)]
+        if not ids:
+            return removed
+        ShiftChange.query.filter(ShiftChange.id.in_(ids)).delete(synchronize_session=False)
+        db.session.commit()
+        removed += len(ids)
@@ -1,9 +1,17 @@
 from functools import wraps
 from flask import request, jsonify, current_app
 import jwt
+from src.extensions import db
 from src.models.user import User
+from src.utils.tenant import request_cache
 
 def token_required(f):
+    """Authenticate the bearer token and pass the user as the first argument.
+
+    The token is checked on every call. The user is cached for the rest of
+    the request (see ``src.utils.tenant.request_cache``), so nested or
+    repeated checks within one request load it only once.
+    """
     @wraps(f)
     def decorated(*args, **kwargs):
         token = None
@@ -19,14 +27,20 @@ def token_required(f):
 
         try:
             data = jwt.decode(token, current_app.config['SECRET_KEY'], algorithms=["HS256"])
-            current_user = User.query.filter_by(id=data['user_id']).first()
-            if not current_user:
-                return jsonify({'message': 'User not found!'}), 401
         except jwt.ExpiredSignatureError:
             return jsonify({'message': 'Token expired! Please log in again.'}), 401
         except jwt.InvalidTokenError:
             return jsonify({'message': 'Invalid token!'}), 401
 
+        cache = request_cache()
+        current_user = cache.get('user')
+        if current_user is None or current_user.id != data.get('user_id'):
+            current_user = db.session.get(User, data.get('user_id'))
+            if not current_user:
+                return jsonify({'message': 'User not found!'}), 401
+            cache['user'] = current_user
+            cache.pop('business', None)
+
         return f(current_user, *args, **kwargs)
 
     return decorated
@@ -0,0 +1,92 @@
+import gzip
+import zlib
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {'application/json', 'text/plain', 'text/html', 'text/csv', 'text/calendar'}
+
+
+def _negotiate():
+    offered = ['br', 'gzip'] if brotli is not None else ['gzip']
+    return request.accept_encodings.best_match(offered)
+
+
+def _stream(chunks, encoding, level):
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=min(level, 11))
+        for chunk in chunks:
+            data = compressor.process(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        for chunk in chunks:
+            # Sync-flush each chunk so streamed output reaches the client promptly
+            data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            if data:
+                yield data
+        yield compressor.flush()
+
+
+def etag_matches(etags, etag, weak=False):
+    """True if ``etags`` (an If-Match or If-None-Match header) names ``etag``
+    or the tag of one of its encoded representations.
+
+    If-Match needs the strong comparison; If-None-Match may pass ``weak=True``.
+    """
+    contains = etags.contains_weak if weak else etags.contains
+    return any(contains(tag) for tag in (etag, f'{etag}-gzip', f'{etag}-br'))
+
+
+def init_compression(app):
+    """Negotiated gzip/brotli response compression.
+
+    Config:
+        COMPRESS_MIN_SIZE: bodies smaller than this many bytes are sent as-is.
+        COMPRESS_LEVEL: gzip level (brotli quality is capped at 11).
+    Streamed responses are compressed chunk by chunk regardless of size.
+    """
+    app.config.setdefault('COMPRESS_MIN_SIZE', 500)
+    app.config.setdefault('COMPRESS_LEVEL', 6)
+
+    @app.after_request
+    def compress_response(response):
+        if (request.method == 'HEAD'
+                or response.status_code < 200 or response.status_code in (204, 304)
+                or response.direct_passthrough
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+            return response
+
+        encoding = _negotiate()
+        response.vary.add('Accept-Encoding')
+        if not encoding:
+            return response
+
+        level = app.config['COMPRESS_LEVEL']
+        if response.is_streamed:
+            response.response = _stream(response.iter_encoded(), encoding, level)
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < app.config['COMPRESS_MIN_SIZE']:
+                return response
+            if encoding == 'br':
+                response.set_data(brotli.compress(data, quality=min(level, 11)))
+            else:
+                response.set_data(gzip.compress(data, compresslevel=level))
+
+        response.headers['Content-Encoding'] = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            # The encoded bytes differ from the identity representation, so
+            # they get their own strong tag rather than a weak one: If-Match
+            # must not accept weak tags
+            response.set_etag(f'{etag}-{encoding}')
+        return response
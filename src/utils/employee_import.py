@@ -0,0 +1,222 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from src.extensions import db
+from src.models.user import Employee
+
+IMPORT_FORMATS = ('csv', 'json', 'ndjson')
+REQUIRED_FIELDS = ('name', 'email', 'role')
+FIELD_LENGTHS = {'name': 100, 'email': 100, 'phone': 20, 'role': 50}
+MAX_REPORTED_ERRORS = 1000
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+def detect_format(filename=None, mimetype=None, requested=None):
+    """Pick an import format from an explicit value, file extension or MIME type."""
+    if requested:
+        requested = requested.lower()
+        if requested not in IMPORT_FORMATS:
+            raise ImportFormatError(f'Unsupported format: {requested}')
+        return requested
+    if filename and '.' in filename:
+        extension = filename.rsplit('.', 1)[1].lower()
+        if extension in IMPORT_FORMATS:
+            return extension
+        if extension == 'jsonl':
+            return 'ndjson'
+    mimetype = (mimetype or '').lower()
+    if 'csv' in mimetype:
+        return 'csv'
+    if 'ndjson' in mimetype or 'jsonl' in mimetype:
+        return 'ndjson'
+    if 'json' in mimetype:
+        return 'json'
+    raise ImportFormatError('Could not detect file format! Use csv, json or ndjson.')
+
+
+def iter_rows(stream, fmt):
+    """Yield row dicts from a binary stream without reading CSV/NDJSON fully into memory."""
+    if fmt == 'csv':
+        reader = csv.DictReader(io.TextIOWrapper(stream, encoding='utf-8-sig', newline=''))
+        if not reader.fieldnames:
+            raise ImportFormatError('CSV file has no header row!')
+        yield from reader
+    elif fmt == 'ndjson':
+        for number, line in enumerate(io.TextIOWrapper(stream, encoding='utf-8'), start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                raise ImportFormatError(f'Invalid JSON on line {number}!')
+    else:
+        try:
+            data = json.load(io.TextIOWrapper(stream, encoding='utf-8'))
+        except ValueError:
+            raise ImportFormatError('Invalid JSON document!')
+        if isinstance(data, dict):
+            data = data.get('employees')
+        if not isinstance(data, list):
+            raise ImportFormatError('JSON must be a list of employees or {"employees": [...]}')
+        yield from data
+
+
+def _clean_row(raw):
+    """Validate a row, keeping only the fields it supplies.
+
+    A field missing from the row (or the CSV header) is left out so an
+    update does not overwrite the stored value; a blank optional field is
+    stored as NULL.
+    """
+    if not isinstance(raw, dict):
+        return None, 'Row must be an object'
+    row = {}
+    for field, max_length in FIELD_LENGTHS.items():
+        if field not in raw:
+            continue
+        value = raw[field]
+        value = '' if value is None else str(value).strip()
+        if len(value) > max_length:
+            return None, f'{field} is longer than {max_length} characters'
+        row[field] = value or None
+    for field in REQUIRED_FIELDS:
+        if not row.get(field):
+            return None, f'Missing required field: {field}'
+    row['email'] = row['email'].lower()
+    if '@' not in row['email']:
+        return None, 'Invalid email address'
+    return row, None
+
+
+def _write_rows(inserts, updates):
+    if inserts:
+        db.session.bulk_insert_mappings(Employee, inserts)
+    if updates:
+        db.session.bulk_update_mappings(Employee, updates)
+
+
+def _import_chunk(business_id, numbered_rows, update_existing, summary):
+    errors = summary['errors']
+
+    def report(row_number, email, message):
+        summary['error_count'] += 1
+        if len(errors) < MAX_REPORTED_ERRORS:
+            errors.append({'row': row_number, 'email': email, 'message': message})
+
+    valid = {}
+    for row_number, raw in numbered_rows:
+        row, message = _clean_row(raw)
+        if message:
+            report(row_number, raw.get('email') if isinstance(raw, dict) else None, message)
+        elif row['email'] in valid:
+            report(row_number, row['email'], f'Duplicate email in import (first seen on row {valid[row["email"]][0]})')
+        else:
+            valid[row['email']] = (row_number, row)
+
+    if not valid:
+        return
+
+    # One lookup per chunk for every email that already exists in this business,
+    # served by ix_employees_business_email_lower
+    existing = dict(
+        db.session.query(func.lower(Employee.email), Employee.id)
+        .filter(Employee.business_id == business_id, func.lower(Employee.email).in_(list(valid)))
+    )
+
+    now = datetime.utcnow()
+    inserts, updates, skipped = [], [], 0
+    for email, (row_number, row) in valid.items():
+        if email not in existing:
+            inserts.append((row_number, dict(row, business_id=business_id, created_at=now, updated_at=now)))
+        elif update_existing:
+            updates.append((row_number, dict(row, id=existing[email], updated_at=now)))
+        else:
+            skipped += 1
+
+    try:
+        _write_rows([row for _, row in inserts], [row for _, row in updates])
+        db.session.commit()
+    except SQLAlchemyError:
+        db.session.rollback()
+        # Usually a concurrent import or edit claimed one of the emails after the
+        # lookup above; retry row by row so only the conflicting rows fail
+        inserts, updates = _write_each(inserts, updates, report)
+
+    summary['created'] += len(inserts)
+    summary['updated'] += len(updates)
+    summary['skipped'] += skipped
+
+
+def _write_each(inserts, updates, report):
+    """Write rows one savepoint at a time, reporting the ones that fail."""
+    written = {True: [], False: []}
+    for is_insert, pending in ((True, inserts), (False, updates)):
+        for row_number, row in pending:
+            try:
+                with db.session.begin_nested():
+                    _write_rows([row] if is_insert else [], [] if is_insert else [row])
+            except IntegrityError:
+                report(row_number, row['email'], 'Email already exists in this business')
+            except SQLAlchemyError:
+                report(row_number, row['email'], 'Database error: row not imported')
+            else:
+                written[is_insert].append((row_number, row))
+    try:
+        db.session.commit()
+    except SQLAlchemyError:
+        db.session.rollback()
+        for row_number, row in written[True] + written[False]:
+            report(row_number, row['email'], 'Database error: row not imported')
+        return [], []
+    return written[True], written[False]
+
+
+def _decoded(rows):
+    try:
+        yield from rows
+    except UnicodeDecodeError:
+        raise ImportFormatError('File is not UTF-8 encoded!')
+
+
+def import_employees(business_id, rows, chunk_size=500, update_existing=True, progress=None):
+    """Validate and upsert employee rows in chunks, one transaction per chunk.
+
+    Employees are matched by email (case-insensitive) within the business;
+    existing ones are updated or, with ``update_existing=False``, skipped.
+    ``progress`` is called with the running summary after every chunk.
+
+    A file that is malformed from the start raises ImportFormatError and
+    imports nothing. If it breaks partway through, the rows before the
+    break are still imported and the summary's ``format_error`` says where
+    it stopped.
+    """
+    summary = {'rows': 0, 'created': 0, 'updated': 0, 'skipped': 0, 'error_count': 0, 'errors': [],
+               'format_error': None}
+    numbered = enumerate(_decoded(rows), start=1)
+    while summary['format_error'] is None:
+        chunk = []
+        try:
+            for item in numbered:
+                chunk.append(item)
+                if len(chunk) >= chunk_size:
+                    break
+        except ImportFormatError as e:
+            if not summary['rows'] and not chunk:
+                raise
+            summary['format_error'] = str(e)
+        if not chunk:
+            break
+        summary['rows'] += len(chunk)
+        _import_chunk(business_id, chunk, update_existing, summary)
+        if progress:
+            progress(summary)
+    return summary
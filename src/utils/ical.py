@@ -0,0 +1,195 @@
+import hashlib
+import secrets
+import threading
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import func, select
+
+from src.extensions import db
+from src.models.user import Employee, Location
+from src.models.schedule import Shift, ShiftChange
+
+ICS_DATETIME_FORMAT = '%Y%m%dT%H%M%SZ'
+
+
+def new_calendar_token():
+    return secrets.token_urlsafe(32)
+
+
+class CalendarCache:
+    """Rendered feeds per employee in this process (one cache per gunicorn worker).
+
+    Entries are trusted for ``CALENDAR_CACHE_SECONDS``; after that the feed
+    state is re-read from the database, and the body is only rebuilt when
+    it changed. Other workers' writes are therefore seen within one TTL.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, employee_id):
+        with self._lock:
+            return self._entries.get(employee_id)
+
+    def put(self, employee_id, entry):
+        with self._lock:
+            self._entries[employee_id] = entry
+
+    def invalidate(self, employee_ids):
+        with self._lock:
+            for employee_id in employee_ids:
+                self._entries.pop(employee_id, None)
+
+    def invalidate_business(self, business_id):
+        with self._lock:
+            for employee_id in [k for k, v in self._entries.items() if v['business_id'] == business_id]:
+                del self._entries[employee_id]
+
+
+def init_calendar(app):
+    """Config:
+        CALENDAR_CACHE_SECONDS: how long a worker serves a cached feed
+            without checking the database.
+        CALENDAR_PAST_DAYS: how far back the feed reaches (future shifts
+            are always included).
+    """
+    app.config.setdefault('CALENDAR_CACHE_SECONDS', 300)
+    app.config.setdefault('CALENDAR_PAST_DAYS', 60)
+    app.extensions['calendar_cache'] = CalendarCache()
+
+
+def invalidate_calendars(employee_ids=None, business_id=None):
+    """Drop cached feeds after a shift write; call with the affected employees."""
+    cache = current_app.extensions.get('calendar_cache')
+    if cache is None:
+        return
+    if employee_ids:
+        cache.invalidate([employee_id for employee_id in employee_ids if employee_id is not None])
+    if business_id is not None:
+        cache.invalidate_business(business_id)
+
+
+def _window_start():
+    return datetime.utcnow() - timedelta(days=current_app.config['CALENDAR_PAST_DAYS'])
+
+
+def feed_state(employee):
+    """(etag, last_modified) from one aggregate over the employee's shifts.
+
+    Count and max id change on inserts and deletes, max updated_at on
+    edits. Deletes leave no row behind, so the newest audit entry for the
+    employee also feeds Last-Modified.
+    """
+    window_start = _window_start()
+    last_change = select(func.max(ShiftChange.created_at)).where(
+        ShiftChange.business_id == employee.business_id,
+        ShiftChange.employee_id == employee.id
+    ).scalar_subquery()
+    count, max_updated, max_id, changed = db.session.query(
+        func.count(Shift.id), func.max(Shift.updated_at), func.max(Shift.id), last_change
+    ).filter(Shift.employee_id == employee.id, Shift.start_time >= window_start).one()
+
+    key = (f'{employee.id}:{employee.calendar_token}:{employee.updated_at}:{window_start:%Y%m%d}:'
+           f'{count}:{max_updated}:{max_id}:{changed}')
+    etag = hashlib.sha1(key.encode()).hexdigest()[:20]
+    last_modified = max(filter(None, (max_updated, changed, employee.updated_at)), default=None)
+    return etag, last_modified
+
+
+def _escape(value):
+    return (value.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+            .replace('\r\n', '\\n').replace('\n', '\\n'))
+
+
+def _line(name, value):
+    """One content line, folded at 75 octets as RFC 5545 requires."""
+    data = f'{name}:{value}'.encode('utf-8')
+    parts = []
+    while len(data) > 75:
+        cut = 75 if not parts else 74
+        # Never split a multi-byte UTF-8 sequence
+        while data[cut] & 0xC0 == 0x80:
+            cut -= 1
+        parts.append(data[:cut])
+        data = data[cut:]
+    parts.append(data)
+    return b'\r\n '.join(parts) + b'\r\n'
+
+
+def write_feed(employee, chunk_rows=200):
+    """Yield the VCALENDAR for ``employee`` in chunks, streaming shift rows."""
+    yield (_line('BEGIN', 'VCALENDAR') + _line('VERSION', '2.0') +
+           _line('PRODID', '-//Crewly//Shift Calendar//EN') + _line('CALSCALE', 'GREGORIAN') +
+           _line('METHOD', 'PUBLISH') + _line('X-WR-CALNAME', _escape(f'{employee.name} shifts')) +
+           _line('X-PUBLISHED-TTL', 'PT15M'))
+
+    rows = db.session.query(
+        Shift.id, Shift.start_time, Shift.end_time, Shift.role, Shift.notes, Shift.version,
+        Shift.updated_at, Location.name
+    ).outerjoin(Location, Location.id == Shift.location_id).filter(
+        Shift.employee_id == employee.id,
+        Shift.start_time >= _window_start()
+    ).order_by(Shift.start_time, Shift.id).yield_per(chunk_rows)
+
+    chunk = []
+    for shift_id, start_time, end_time, role, notes, version, updated_at, location in rows:
+        event = [
+            _line('BEGIN', 'VEVENT'),
+            _line('UID', f'shift-{shift_id}@crewly'),
+            _line('DTSTAMP', (updated_at or start_time).strftime(ICS_DATETIME_FORMAT)),
+            _line('DTSTART', start_time.strftime(ICS_DATETIME_FORMAT)),
+            _line('DTEND', end_time.strftime(ICS_DATETIME_FORMAT)),
+            _line('SEQUENCE', str((version or 1) - 1)),
+            _line('SUMMARY', _escape(role or employee.role or 'Shift')),
+        ]
+        if location:
+            event.append(_line('LOCATION', _escape(location)))
+        if notes:
+            event.append(_line('DESCRIPTION', _escape(notes)))
+        event.append(_line('END', 'VEVENT'))
+        chunk.append(b''.join(event))
+        if len(chunk) >= chunk_rows:
+            yield b''.join(chunk)
+            chunk = []
+    chunk.append(_line('END', 'VCALENDAR'))
+    yield b''.join(chunk)
+
+
+def calendar_feed(employee):
+    """(etag, last_modified, body) for a feed request.
+
+    ``body`` is the cached bytes when available, otherwise a generator
+    that streams the feed and stores it in the cache once complete.
+    """
+    cache = current_app.extensions['calendar_cache']
+    entry = cache.get(employee.id)
+    now = time.monotonic()
+    if entry and entry['token'] == employee.calendar_token and entry['expires'] > now:
+        return entry['etag'], entry['last_modified'], entry['body']
+
+    etag, last_modified = feed_state(employee)
+    ttl = current_app.config['CALENDAR_CACHE_SECONDS']
+    if entry and entry['etag'] == etag:
+        entry['expires'] = now + ttl
+        return etag, last_modified, entry['body']
+
+    employee_id, business_id, token = employee.id, employee.business_id, employee.calendar_token
+
+    def generate():
+        chunks = []
+        for chunk in write_feed(employee):
+            chunks.append(chunk)
+            yield chunk
+        cache.put(employee_id, {
+            'business_id': business_id, 'token': token, 'etag': etag, 'last_modified': last_modified,
+            'body': b''.join(chunks), 'expires': time.monotonic() + ttl
+        })
+
+    return etag, last_modified, generate()
+
+
+def employee_for_token(token):
+    return Employee.query.filter_by(calendar_token=token).first() if token else None
@@ -0,0 +1,97 @@
+import hashlib
+from datetime import datetime, timedelta
+from functools import wraps
+
+from flask import current_app, jsonify, make_response, request
+from sqlalchemy.exc import IntegrityError
+
+from src.extensions import db
+from src.models.idempotency import IdempotencyKey
+
+MAX_KEY_LENGTH = 255
+
+
+def _sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _replay(record):
+    response = current_app.response_class(record.response, status=record.status_code, mimetype='application/json')
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def idempotent(f):
+    """Honour an ``Idempotency-Key`` header on a write route.
+
+    The first request with a key runs normally and its response is stored
+    for IDEMPOTENCY_TTL_SECONDS. Retries with the same key and body get
+    the stored response back without running the view again. Apply below
+    ``token_required`` so keys are scoped per user.
+    """
+    @wraps(f)
+    def decorated(current_user, *args, **kwargs):
+        key = request.headers.get('Idempotency-Key')
+        if not key:
+            return f(current_user, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return jsonify({'message': f'Idempotency-Key must be at most {MAX_KEY_LENGTH} characters!'}), 400
+
+        now = datetime.utcnow()
+        key_hash = _sha256(f'{request.method} {request.path} {key}'.encode())
+        request_hash = _sha256(request.get_data())
+
+        record = IdempotencyKey.query.filter_by(user_id=current_user.id, key_hash=key_hash).first()
+        if record and record.expires_at <= now:
+            db.session.delete(record)
+            db.session.commit()
+            record = None
+
+        if record:
+            if record.request_hash != request_hash:
+                return jsonify({'message': 'Idempotency-Key was already used for a different request!'}), 422
+            if record.status_code is None:
+                return jsonify({'message': 'A request with this Idempotency-Key is still in progress!'}), 409
+            return _replay(record)
+
+        # Claim the key before running the view so concurrent retries cannot both run it
+        ttl = timedelta(seconds=current_app.config.get('IDEMPOTENCY_TTL_SECONDS', 86400))
+        record = IdempotencyKey(
+            business_id=current_user.business_id,
+            user_id=current_user.id,
+            key_hash=key_hash,
+            request_hash=request_hash,
+            created_at=now,
+            expires_at=now + ttl
+        )
+        try:
+            IdempotencyKey.query.filter(
+                IdempotencyKey.user_id == current_user.id,
+                IdempotencyKey.expires_at <= now
+            ).delete(synchronize_session=False)
+            db.session.add(record)
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            return jsonify({'message': 'A request with this Idempotency-Key is still in progress!'}), 409
+        record_id = record.id
+
+        try:
+            response = make_response(f(current_user, *args, **kwargs))
+        except Exception:
+            db.session.rollback()
+            IdempotencyKey.query.filter_by(id=record_id).delete()
+            db.session.commit()
+            raise
+
+        record = db.session.get(IdempotencyKey, record_id)
+        if response.status_code >= 500:
+            # Let the client retry failures
+            db.session.delete(record)
+        else:
+            record.status_code = response.status_code
+            record.response = response.get_data(as_text=True)
+        db.session.commit()
+        return response
+
+    return decorated
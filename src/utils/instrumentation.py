@@ -0,0 +1,214 @@
+import bisect
+import logging
+import threading
+import time
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+from src.extensions import db
+
+try:
+    from flask.json.provider import DefaultJSONProvider
+except ImportError:  # Flask < 2.2 has no pluggable JSON provider
+    DefaultJSONProvider = None
+
+slow_query_logger = logging.getLogger('crewly.slow_query')
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+class Histogram:
+    """Cumulative-bucket histogram, one series per label tuple."""
+
+    def __init__(self, name, help_text, labels, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label_values, value):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * len(self.buckets), 0, 0.0]
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                series[0][index] += 1
+            series[1] += 1
+            series[2] += value
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            snapshot = {k: (list(v[0]), v[1], v[2]) for k, v in self._series.items()}
+        for label_values, (counts, total, value_sum) in sorted(snapshot.items()):
+            base = _format_labels(self.labels, label_values)
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{base}le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{base}le="+Inf"}} {total}')
+            lines.append(f'{self.name}_sum{{{base.rstrip(",")}}} {value_sum}')
+            lines.append(f'{self.name}_count{{{base.rstrip(",")}}} {total}')
+        return lines
+
+
+class Counter:
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def render(self):
+        return [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter',
+                f'{self.name} {self.value}']
+
+
+def _format_labels(names, values):
+    parts = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace('\\', '\\\\').replace('"', '\\"')
+        parts.append(f'{name}="{escaped}",')
+    return ''.join(parts)
+
+
+request_latency = Histogram(
+    'crewly_http_request_duration_seconds', 'Request latency by endpoint.',
+    ('endpoint', 'method', 'status'), LATENCY_BUCKETS)
+request_queries = Histogram(
+    'crewly_db_queries_per_request', 'Number of SQL statements executed per request.',
+    ('endpoint',), QUERY_COUNT_BUCKETS)
+request_db_time = Histogram(
+    'crewly_db_time_seconds', 'Time spent in SQL statements per request.',
+    ('endpoint',), LATENCY_BUCKETS)
+request_serialization_time = Histogram(
+    'crewly_serialization_seconds', 'Time spent encoding JSON responses per request.',
+    ('endpoint',), LATENCY_BUCKETS)
+slow_queries = Counter('crewly_slow_queries_total', 'SQL statements slower than SLOW_QUERY_MS.')
+
+METRICS = (request_latency, request_queries, request_db_time, request_serialization_time, slow_queries)
+
+
+def render_metrics():
+    """Render every collected metric in the Prometheus text exposition format."""
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+def _request_stats():
+    if has_request_context():
+        return g.get('_perf')
+    return None
+
+
+def _add_serialize_time(started):
+    stats = _request_stats()
+    if stats is not None:
+        stats['serialize_time'] += time.perf_counter() - started
+
+
+if DefaultJSONProvider is not None:
+    class TimedJSONProvider(DefaultJSONProvider):
+        """JSON provider that accounts encoding time to the current request."""
+
+        def dumps(self, obj, **kwargs):
+            started = time.perf_counter()
+            try:
+                return super().dumps(obj, **kwargs)
+            finally:
+                _add_serialize_time(started)
+else:
+    TimedJSONProvider = None
+
+
+def timed_json_encoder(base):
+    """Subclass a Flask < 2.2 ``app.json_encoder`` to account encoding time the same way."""
+    class TimedJSONEncoder(base):
+        def encode(self, o):
+            started = time.perf_counter()
+            try:
+                return super().encode(o)
+            finally:
+                _add_serialize_time(started)
+
+    return TimedJSONEncoder
+
+
+def init_instrumentation(app):
+    """Hook SQLAlchemy engine events and the Flask request lifecycle.
+
+    Config:
+        SERVER_TIMING: add a ``Server-Timing`` header to every response.
+        SLOW_QUERY_MS: log statements slower than this many milliseconds
+            (0 disables the slow-query log).
+    """
+    app.config.setdefault('SERVER_TIMING', False)
+    app.config.setdefault('SLOW_QUERY_MS', 200)
+
+    if TimedJSONProvider is not None:
+        app.json = TimedJSONProvider(app)
+    else:
+        app.json_encoder = timed_json_encoder(app.json_encoder)
+
+    slow_query_seconds = app.config['SLOW_QUERY_MS'] / 1000.0
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('_query_start', []).append(time.perf_counter())
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['_query_start'].pop()
+        stats = _request_stats()
+        if stats is not None:
+            stats['queries'] += 1
+            stats['db_time'] += elapsed
+        if slow_query_seconds and elapsed >= slow_query_seconds:
+            slow_queries.inc()
+            slow_query_logger.warning(
+                'Slow query (%.1f ms) on %s: %s',
+                elapsed * 1000, request.endpoint if has_request_context() else '-',
+                ' '.join(statement.split()))
+
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+        event.listen(db.engine, 'after_cursor_execute', after_cursor_execute)
+
+    @app.before_request
+    def start_request_timer():
+        g._perf = {
+            'start': time.perf_counter(),
+            'queries': 0,
+            'db_time': 0.0,
+            'serialize_time': 0.0,
+        }
+
+    @app.after_request
+    def record_request_metrics(response):
+        stats = g.get('_perf')
+        if stats is None:
+            return response
+
+        endpoint = request.endpoint or 'unmatched'
+        elapsed = time.perf_counter() - stats['start']
+        request_latency.observe((endpoint, request.method, str(response.status_code)), elapsed)
+        request_queries.observe((endpoint,), stats['queries'])
+        request_db_time.observe((endpoint,), stats['db_time'])
+        request_serialization_time.observe((endpoint,), stats['serialize_time'])
+
+        if app.config['SERVER_TIMING']:
+            response.headers['Server-Timing'] = ', '.join([
+                f'db;dur={stats["db_time"] * 1000:.2f};desc="{stats["queries"]} queries"',
+                f'serialize;dur={stats["serialize_time"] * 1000:.2f}',
+                f'total;dur={elapsed * 1000:.2f}',
+            ])
+        return response
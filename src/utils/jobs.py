@@ -0,0 +1,294 @@
+import io
+import json
+import logging
+import threading
+from datetime import datetime, timedelta
+
+from flask import current_app, jsonify, request, url_for
+from sqlalchemy import func
+from sqlalchemy.exc import SQLAlchemyError
+
+from src.extensions import db
+from src.models.job import Job
+
+logger = logging.getLogger('crewly.jobs')
+
+FINISHED_STATUSES = ('succeeded', 'failed', 'cancelled')
+JOB_HANDLERS = {}
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobLost(Exception):
+    """This run no longer owns the job: it was requeued and claimed again."""
+
+
+class UploadTooLarge(ValueError):
+    pass
+
+
+def init_jobs(app):
+    """Config:
+        JOB_MAX_UPLOAD_BYTES: largest request body stored with a job.
+        JOB_STALE_SECONDS: a running job without a heartbeat for this long
+            is assumed lost with its worker and is requeued.
+        JOB_HEARTBEAT_SECONDS: how often a running job's worker refreshes
+            its heartbeat; keep it well below JOB_STALE_SECONDS.
+        JOB_MAX_ATTEMPTS: after this many lost runs a job is failed instead.
+    """
+    app.config.setdefault('JOB_MAX_UPLOAD_BYTES', 50 * 1024 * 1024)
+    app.config.setdefault('JOB_STALE_SECONDS', 600)
+    app.config.setdefault('JOB_HEARTBEAT_SECONDS', 30)
+    app.config.setdefault('JOB_MAX_ATTEMPTS', 3)
+
+
+def job_handler(kind):
+    """Register ``fn(payload, context)`` as the handler for ``kind`` jobs."""
+    def decorator(fn):
+        JOB_HANDLERS[kind] = fn
+        return fn
+    return decorator
+
+
+def wants_async():
+    """True for ``?async=1`` or ``Prefer: respond-async``."""
+    return (request.args.get('async', '').lower() in ('1', 'true', 'yes')
+            or 'respond-async' in request.headers.get('Prefer', ''))
+
+
+def enqueue(kind, payload, business_id=None, user_id=None, upload=None):
+    """Queue a job and commit; a worker picks it up on its next poll."""
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f'Unknown job kind: {kind}')
+    job = Job(kind=kind, business_id=business_id, user_id=user_id, payload=json.dumps(payload), upload=upload)
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+
+def read_upload(stream):
+    """Read a request body to store with a job (in the database, so any worker host can use it)."""
+    limit = current_app.config['JOB_MAX_UPLOAD_BYTES']
+    data = stream.read(limit + 1)
+    if len(data) > limit:
+        raise UploadTooLarge(f'Upload is larger than {limit} bytes!')
+    return data
+
+
+def serialize_job(job):
+    return {
+        'id': job.id,
+        'kind': job.kind,
+        'status': job.status,
+        'progress': {'done': job.progress_done, 'total': job.progress_total},
+        'cancel_requested': job.cancel_requested,
+        'result': json.loads(job.result) if job.result else None,
+        'error': job.error,
+        'created_at': job.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+        'started_at': job.started_at.strftime('%Y-%m-%d %H:%M:%S') if job.started_at else None,
+        'finished_at': job.finished_at.strftime('%Y-%m-%d %H:%M:%S') if job.finished_at else None
+    }
+
+
+def job_accepted(job):
+    """202 response pointing the client at the job's status URL."""
+    location = url_for('jobs.get_job', job_id=job.id)
+    response = jsonify({'message': 'Job queued!', 'job': serialize_job(job), 'status_url': location})
+    response.headers['Location'] = location
+    response.headers['Preference-Applied'] = 'respond-async'
+    return response, 202
+
+
+def claim_next(worker):
+    """Mark the oldest queued job as running for ``worker`` and return it, or None.
+
+    The UPDATE only matches while the row is still queued, so two workers
+    can never run the same job. On Postgres candidates are read with
+    FOR UPDATE SKIP LOCKED so busy workers do not queue up on one row.
+    """
+    jobs = Job.__table__
+    query = db.session.query(Job.id).filter(Job.status == 'queued').order_by(Job.id).limit(5)
+    if db.engine.dialect.name == 'postgresql':
+        query = query.with_for_update(skip_locked=True)
+    candidates = [row[0] for row in query]
+    now = datetime.utcnow()
+    for job_id in candidates:
+        result = db.session.execute(jobs.update().where(jobs.c.id == job_id, jobs.c.status == 'queued').values(
+            status='running', worker=worker, started_at=now, heartbeat_at=now, attempts=jobs.c.attempts + 1))
+        if result.rowcount == 1:
+            db.session.commit()
+            return db.session.get(Job, job_id, populate_existing=True)
+    db.session.commit()
+    return None
+
+
+def requeue_stale():
+    """Requeue running jobs whose worker stopped heartbeating; fail them after JOB_MAX_ATTEMPTS."""
+    jobs = Job.__table__
+    cutoff = datetime.utcnow() - timedelta(seconds=current_app.config['JOB_STALE_SECONDS'])
+    stale = [jobs.c.status == 'running', jobs.c.heartbeat_at < cutoff]
+    with db.engine.begin() as conn:
+        conn.execute(jobs.update().where(*stale, jobs.c.attempts >= current_app.config['JOB_MAX_ATTEMPTS']).values(
+            status='failed', error='Worker lost too many times.', finished_at=datetime.utcnow(), upload=None))
+        requeued = conn.execute(jobs.update().where(*stale).values(status='queued', worker=None)).rowcount
+    return requeued
+
+
+def request_cancel(job):
+    """Cancel a queued job now, or flag a running one to stop at its next progress report."""
+    jobs = Job.__table__
+    with db.engine.begin() as conn:
+        if conn.execute(jobs.update().where(jobs.c.id == job.id, jobs.c.status == 'queued').values(
+                status='cancelled', cancel_requested=True, finished_at=datetime.utcnow(), upload=None)).rowcount:
+            return
+        conn.execute(jobs.update().where(jobs.c.id == job.id, jobs.c.status == 'running').values(
+            cancel_requested=True))
+
+
+class JobContext:
+    """Passed to handlers to report progress and notice cancellation.
+
+    Progress is written on its own connection and committed at once, so
+    it is visible to pollers while the handler's work is still running.
+    Call it between committed chunks; it raises JobCancelled when the job
+    has been cancelled.
+
+    Every write is fenced on this run's worker and attempt number. If the
+    job was requeued and claimed again, progress raises JobLost and the
+    outcome of this run is discarded instead of overwriting the new one.
+    """
+
+    def __init__(self, job):
+        self.job_id = job.id
+        self.business_id = job.business_id
+        self.user_id = job.user_id
+        self.worker = job.worker
+        self.attempt = job.attempts
+
+    def fence(self):
+        jobs = Job.__table__
+        return (jobs.c.id == self.job_id, jobs.c.status == 'running',
+                jobs.c.worker == self.worker, jobs.c.attempts == self.attempt)
+
+    def upload(self):
+        """The request body stored with the job."""
+        return db.session.query(Job.upload).filter(Job.id == self.job_id).scalar() or b''
+
+    def progress(self, done, total=None):
+        jobs = Job.__table__
+        values = {'progress_done': done, 'heartbeat_at': datetime.utcnow()}
+        if total is not None:
+            values['progress_total'] = total
+        with db.engine.begin() as conn:
+            if not conn.execute(jobs.update().where(*self.fence()).values(**values)).rowcount:
+                raise JobLost()
+            cancelled = conn.execute(
+                jobs.select().with_only_columns(jobs.c.cancel_requested).where(jobs.c.id == self.job_id)).scalar()
+        if cancelled:
+            raise JobCancelled()
+
+
+class Heartbeat(threading.Thread):
+    """Keeps ``heartbeat_at`` fresh while a handler is inside one long statement.
+
+    Without it a copy that runs longer than JOB_STALE_SECONDS between
+    progress reports would be requeued and run a second time.
+    """
+
+    def __init__(self, engine, context, interval):
+        super().__init__(name=f'job-{context.job_id}-heartbeat', daemon=True)
+        self.engine, self.context, self.interval = engine, context, interval
+        self.stopped = threading.Event()
+
+    def run(self):
+        jobs = Job.__table__
+        while not self.stopped.wait(self.interval):
+            try:
+                with self.engine.begin() as conn:
+                    conn.execute(jobs.update().where(*self.context.fence()).values(heartbeat_at=datetime.utcnow()))
+            except SQLAlchemyError:  # e.g. SQLite busy while the handler holds the write lock; retry next beat
+                logger.debug('Heartbeat for job %s failed', self.context.job_id, exc_info=True)
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def _finish(context, status, result=None, error=None):
+    """Record the outcome; False when another run owns the job now."""
+    jobs = Job.__table__
+    values = {'status': status, 'result': json.dumps(result) if result is not None else None, 'error': error,
+              'finished_at': datetime.utcnow(), 'upload': None}
+    if status == 'succeeded':
+        values['progress_done'] = func.coalesce(jobs.c.progress_total, jobs.c.progress_done)
+    with db.engine.begin() as conn:
+        return conn.execute(jobs.update().where(*context.fence()).values(**values)).rowcount == 1
+
+
+def run_job(job):
+    """Run a claimed job to completion and record its outcome."""
+    job_id, kind, payload = job.id, job.kind, json.loads(job.payload or '{}')
+    context = JobContext(job)
+    heartbeat = Heartbeat(db.engine, context, current_app.config['JOB_HEARTBEAT_SECONDS'])
+    heartbeat.start()
+    try:
+        context.progress(0)
+        result = JOB_HANDLERS[kind](payload, context)
+    except JobLost:
+        db.session.rollback()
+        finished = False
+    except JobCancelled:
+        db.session.rollback()
+        finished = _finish(context, 'cancelled')
+    except Exception as e:
+        db.session.rollback()
+        logger.exception('Job %s (%s) failed', job_id, kind)
+        finished = _finish(context, 'failed', error=str(e) or e.__class__.__name__)
+    else:
+        finished = _finish(context, 'succeeded', result)
+    finally:
+        heartbeat.stop()
+        db.session.remove()
+    if not finished:
+        logger.warning('Job %s (%s) was taken over by another run; discarded this outcome', job_id, kind)
+
+
+@job_handler('copy_week')
+def copy_week_job(payload, context):
+    from src.utils.ical import invalidate_calendars
+    from src.utils.schedule_copy import copy_and_audit
+
+    context.progress(0, 1)  # last chance to cancel: the copy is a single statement
+    created, skipped = copy_and_audit(
+        context.business_id, context.user_id,
+        datetime.strptime(payload['source_start'], '%Y-%m-%d'),
+        datetime.strptime(payload['target_start'], '%Y-%m-%d'),
+        payload.get('days', 7), payload.get('employee_ids'), payload.get('roles'), payload.get('location_id'))
+    invalidate_calendars(business_id=context.business_id)
+    return {'created': created, 'skipped_conflicts': skipped}
+
+
+@job_handler('employee_import')
+def employee_import_job(payload, context):
+    from src.utils.employee_import import import_employees, iter_rows
+
+    data = context.upload()
+    fh = io.BytesIO(data)
+    # Progress in bytes read: the row count is unknown until the end. The
+    # text wrapper in iter_rows closes the buffer once the rows run out.
+    return import_employees(
+        context.business_id, iter_rows(fh, payload['format']),
+        chunk_size=payload.get('chunk_size', 500),
+        update_existing=payload.get('update_existing', True),
+        progress=lambda summary: context.progress(len(data) if fh.closed else fh.tell(), len(data)))
+
+
+@job_handler('archive')
+def archive_job(payload, context):
+    from src.utils.archive import archive_shifts
+
+    before = datetime.strptime(payload['before'], '%Y-%m-%d %H:%M:%S')
+    moved = archive_shifts(before, batch_size=payload.get('batch_size', 1000), progress=context.progress)
+    return {'archived': moved, 'before': payload['before']}
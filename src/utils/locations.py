@@ -0,0 +1,30 @@
+from flask import request
+
+from src.models.user import Location
+
+
+class LocationError(ValueError):
+    pass
+
+
+def location_filter():
+    """``?location_id=`` as an int, or None when absent."""
+    value = request.args.get('location_id')
+    if not value:
+        return None
+    if not value.isdigit():
+        raise LocationError('Invalid location_id! Must be integer.')
+    return int(value)
+
+
+def resolve_location(business_id, location_id):
+    """Validate a location id from a request body against the business."""
+    if location_id is None:
+        return None
+    try:
+        location_id = int(location_id)
+    except (ValueError, TypeError):
+        raise LocationError('Invalid location_id! Must be an integer.')
+    if not Location.query.filter_by(id=location_id, business_id=business_id).first():
+        raise LocationError('Location not found!')
+    return location_id
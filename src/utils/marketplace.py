@@ -0,0 +1,113 @@
+from datetime import datetime
+
+from sqlalchemy import and_, exists
+
+from src.extensions import db
+from src.models.schedule import Shift, ShiftSwapRequest, TimeOffRequest
+from src.models.user import Employee
+
+shifts = Shift.__table__
+time_off = TimeOffRequest.__table__
+
+
+def _free_for(employee_id, ignore_shift_id=None):
+    """Conditions, correlated to the shift being updated, that ``employee_id``
+    has no overlapping shift and no approved time off during it."""
+    other = shifts.alias('other_shifts')
+    overlap = [
+        other.c.employee_id == employee_id,
+        other.c.id != shifts.c.id,
+        other.c.start_time < shifts.c.end_time,
+        other.c.end_time > shifts.c.start_time
+    ]
+    if ignore_shift_id is not None:
+        overlap.append(other.c.id != ignore_shift_id)
+    return [
+        ~exists().where(and_(*overlap)),
+        ~exists().where(
+            time_off.c.employee_id == employee_id,
+            time_off.c.status == 'approved',
+            time_off.c.start_date < shifts.c.end_time,
+            time_off.c.end_date > shifts.c.start_time
+        )
+    ]
+
+
+def _lock_employees(*employee_ids):
+    """SELECT ... FOR UPDATE the employees about to receive shifts, in id order.
+
+    The NOT EXISTS overlap check inside an UPDATE only sees committed
+    rows, so under Postgres READ COMMITTED two claims of different,
+    overlapping shifts by one employee could both pass it. Holding the
+    employee row serializes them: the second claim's UPDATE runs after
+    the first commits and sees its shift. SQLite has a single writer
+    and ignores FOR UPDATE.
+    """
+    ids = sorted({employee_id for employee_id in employee_ids if employee_id is not None})
+    db.session.query(Employee.id).filter(Employee.id.in_(ids)).order_by(Employee.id).with_for_update().all()
+
+
+def _reassign(shift_id, conditions, values):
+    """One conditional UPDATE; True only for the caller whose row matched."""
+    result = db.session.execute(
+        shifts.update().where(shifts.c.id == shift_id, *conditions).values(
+            version=shifts.c.version + 1, updated_at=datetime.utcnow(), **values))
+    return result.rowcount == 1
+
+
+def has_conflict(shift, employee_id):
+    """Why a claim lost, for the error message; not used to decide the claim."""
+    return db.session.query(shifts.c.id).filter(shifts.c.id == shift.id, *_free_for(employee_id)).first() is None
+
+
+def claim_shift(shift, employee_id):
+    """Atomically hand an open shift to ``employee_id``.
+
+    The availability checks run inside the UPDATE, and the row only
+    matches while the shift is still open at the version that was read,
+    so among concurrent claimants exactly one gets ``True``. The
+    claimant's employee row is locked first (see ``_lock_employees``).
+    """
+    _lock_employees(employee_id)
+    return _reassign(shift.id, [
+        shifts.c.business_id == shift.business_id,
+        shifts.c.status == 'open',
+        shifts.c.version == shift.version,
+        shifts.c.employee_id != employee_id,
+        *_free_for(employee_id)
+    ], {'employee_id': employee_id, 'status': 'assigned'})
+
+
+def set_swap_status(swap, status, from_status='pending'):
+    """Move a swap request out of ``from_status``; False if someone got there first."""
+    result = db.session.execute(
+        ShiftSwapRequest.__table__.update().where(
+            ShiftSwapRequest.id == swap.id,
+            ShiftSwapRequest.status == from_status
+        ).values(status=status, updated_at=datetime.utcnow()))
+    return result.rowcount == 1
+
+
+def accept_swap(swap):
+    """Apply an accepted swap; the caller commits on True and rolls back on False.
+
+    The offered shift moves to the target (ignoring the shift they give up
+    in exchange), then the exchanged shift moves to the requester. Each
+    UPDATE also checks the shift is still held by the expected employee.
+    """
+    if not set_swap_status(swap, 'accepted'):
+        return False
+    _lock_employees(swap.requester_employee_id, swap.target_employee_id)
+    if not _reassign(swap.shift_id, [
+        shifts.c.business_id == swap.business_id,
+        shifts.c.employee_id == swap.requester_employee_id,
+        *_free_for(swap.target_employee_id, ignore_shift_id=swap.target_shift_id)
+    ], {'employee_id': swap.target_employee_id, 'status': 'assigned'}):
+        return False
+    if swap.target_shift_id is not None and not _reassign(swap.target_shift_id, [
+        shifts.c.business_id == swap.business_id,
+        shifts.c.employee_id == swap.target_employee_id,
+        *_free_for(swap.requester_employee_id)
+    ], {'employee_id': swap.requester_employee_id, 'status': 'assigned'}):
+        return False
+    return True
@@ -0,0 +1,9 @@
+from flask import current_app, request
+
+
+def page_args(default_per_page=50):
+    """Read ``page``/``per_page`` from the query string, capped at MAX_PER_PAGE."""
+    page = request.args.get('page', default=1, type=int) or 1
+    per_page = request.args.get('per_page', default=default_per_page, type=int) or default_per_page
+    max_per_page = current_app.config.get('MAX_PER_PAGE', 200)
+    return max(page, 1), min(max(per_page, 1), max_per_page)
@@ -0,0 +1,41 @@
+from flask import request
+
+DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def format_datetime(value):
+    return value.strftime(DATETIME_FORMAT) if value is not None else None
+
+
+def format_time(value):
+    return value.strftime('%H:%M:%S') if value is not None else None
+
+
+class FieldsError(ValueError):
+    pass
+
+
+def requested_fields(serializers):
+    """Fields named by ``?fields=a,b`` (in request order), or all of them.
+
+    ``serializers`` maps each public field name to a formatter (or None to
+    pass the value through); its key order is the default output order.
+    """
+    raw = request.args.get('fields')
+    if not raw:
+        return list(serializers)
+    fields = list(dict.fromkeys(f.strip() for f in raw.split(',') if f.strip()))
+    unknown = [f for f in fields if f not in serializers]
+    if unknown or not fields:
+        raise FieldsError(f'Unknown fields: {", ".join(unknown)}. Allowed: {", ".join(serializers)}')
+    return fields
+
+
+def serialize(row, fields, serializers):
+    """Build the output dict for ``fields`` from a row or model instance."""
+    output = {}
+    for field in fields:
+        value = getattr(row, field)
+        formatter = serializers[field]
+        output[field] = formatter(value) if formatter else value
+    return output
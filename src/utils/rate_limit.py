@@ -0,0 +1,185 @@
+import math
+import sqlite3
+import threading
+import time
+from functools import wraps
+
+from flask import current_app, jsonify, request
+
+
+def _take_all(levels, cost, buckets):
+    """Charge every bucket or none, given their refilled token levels.
+
+    Returns (new levels, seconds to wait); the wait is 0 when allowed.
+    """
+    wait = max((cost - tokens) / rate if tokens < cost else 0
+               for tokens, (_, rate, _) in zip(levels, buckets))
+    if not wait:
+        levels = [tokens - cost for tokens in levels]
+    return levels, wait
+
+
+class MemoryBucketStore:
+    """Token buckets in this process only (one set per gunicorn worker)."""
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def take(self, cost, buckets):
+        """Remove ``cost`` tokens from every bucket, or from none if any is short.
+
+        ``buckets`` is a sequence of ``(key, rate, capacity)``. Returns the
+        seconds to wait until all of them allow it (0 when allowed).
+        """
+        now = time.monotonic()
+        with self._lock:
+            levels = []
+            for key, rate, capacity in buckets:
+                tokens, updated = self._buckets.get(key, (capacity, now))
+                levels.append(min(capacity, tokens + (now - updated) * rate))
+            levels, wait = _take_all(levels, cost, buckets)
+            for (key, _, _), tokens in zip(buckets, levels):
+                self._buckets[key] = (tokens, now)
+            return wait
+
+
+class SqliteBucketStore:
+    """Buckets shared by every worker process on one host through a SQLite file.
+
+    Also a local stand-in for the Redis store in development and tests.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL, updated REAL)')
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        return conn
+
+    def take(self, cost, buckets):
+        now = time.time()
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            levels = []
+            for key, rate, capacity in buckets:
+                row = conn.execute('SELECT tokens, updated FROM buckets WHERE key = ?', (key,)).fetchone()
+                tokens, updated = row if row else (capacity, now)
+                levels.append(min(capacity, tokens + max(0.0, now - updated) * rate))
+            levels, wait = _take_all(levels, cost, buckets)
+            conn.executemany('INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)',
+                             [(key, tokens, now) for (key, _, _), tokens in zip(buckets, levels)])
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return wait
+
+
+class RedisBucketStore:
+    """Buckets shared across hosts in Redis (needs the optional ``redis`` package)."""
+
+    SCRIPT = """
+    local cost, now = tonumber(ARGV[1]), tonumber(ARGV[2])
+    local levels, wait = {}, 0
+    for i, key in ipairs(KEYS) do
+        local rate, capacity = tonumber(ARGV[1 + 2 * i]), tonumber(ARGV[2 + 2 * i])
+        local bucket = redis.call('HMGET', key, 'tokens', 'updated')
+        local tokens = tonumber(bucket[1]) or capacity
+        local updated = tonumber(bucket[2]) or now
+        tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+        if tokens < cost then wait = math.max(wait, (cost - tokens) / rate) end
+        levels[i] = tokens
+    end
+    for i, key in ipairs(KEYS) do
+        local rate, capacity = tonumber(ARGV[1 + 2 * i]), tonumber(ARGV[2 + 2 * i])
+        local tokens = levels[i]
+        if wait == 0 then tokens = tokens - cost end
+        redis.call('HSET', key, 'tokens', tokens, 'updated', now)
+        redis.call('EXPIRE', key, math.ceil(capacity / rate) + 1)
+    end
+    return tostring(wait)
+    """
+
+    def __init__(self, client):
+        self._take = client.register_script(self.SCRIPT)
+
+    @classmethod
+    def from_url(cls, url):
+        import redis
+        return cls(redis.Redis.from_url(url))
+
+    def take(self, cost, buckets):
+        args = [cost, time.time()]
+        for _, rate, capacity in buckets:
+            args.extend((rate, capacity))
+        return float(self._take(keys=[f'ratelimit:{key}' for key, _, _ in buckets], args=args))
+
+
+def create_store(url):
+    if not url or url == 'memory://':
+        return MemoryBucketStore()
+    if url.startswith('sqlite:///'):
+        return SqliteBucketStore(url[len('sqlite:///'):])
+    if url.startswith(('redis://', 'rediss://')):
+        return RedisBucketStore.from_url(url)
+    raise ValueError(f'Unsupported RATELIMIT_STORAGE_URL: {url}')
+
+
+def init_rate_limiting(app):
+    """Config:
+        RATELIMIT_ENABLED: turn the limiter on or off.
+        RATELIMIT_STORAGE_URL: memory:// (per process), sqlite:///path
+            (shared on one host) or redis://... (shared across hosts).
+        RATELIMIT_USER_RATE / RATELIMIT_USER_BURST: tokens per second and
+            bucket size for each user.
+        RATELIMIT_BUSINESS_RATE / RATELIMIT_BUSINESS_BURST: the same for
+            each business, shared by all of its users.
+        RATELIMIT_COSTS: per-endpoint cost overrides, e.g.
+            {'schedule.get_shifts': 10}.
+    """
+    app.config.setdefault('RATELIMIT_ENABLED', True)
+    app.config.setdefault('RATELIMIT_STORAGE_URL', 'memory://')
+    app.config.setdefault('RATELIMIT_USER_RATE', 10.0)
+    app.config.setdefault('RATELIMIT_USER_BURST', 60)
+    app.config.setdefault('RATELIMIT_BUSINESS_RATE', 30.0)
+    app.config.setdefault('RATELIMIT_BUSINESS_BURST', 200)
+    app.config.setdefault('RATELIMIT_COSTS', {})
+    app.extensions['rate_limit_store'] = create_store(app.config['RATELIMIT_STORAGE_URL'])
+
+
+def rate_limited(cost=1):
+    """Charge ``cost`` tokens to the caller's user and business buckets.
+
+    Both buckets are checked and charged in one step, so a request refused
+    by either one costs nothing. Apply below ``token_required``. Over-limit
+    requests get 429 with ``Retry-After`` before the view runs.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(current_user, *args, **kwargs):
+            config = current_app.config
+            store = current_app.extensions.get('rate_limit_store')
+            if not config.get('RATELIMIT_ENABLED') or store is None:
+                return f(current_user, *args, **kwargs)
+
+            weight = config['RATELIMIT_COSTS'].get(request.endpoint, cost)
+            wait = store.take(weight, (
+                (f'user:{current_user.id}', config['RATELIMIT_USER_RATE'], config['RATELIMIT_USER_BURST']),
+                (f'business:{current_user.business_id}',
+                 config['RATELIMIT_BUSINESS_RATE'], config['RATELIMIT_BUSINESS_BURST']),
+            ))
+            if wait:
+                response = jsonify({'message': 'Too many requests! Please slow down.'})
+                response.headers['Retry-After'] = str(max(1, math.ceil(wait)))
+                return response, 429
+
+            return f(current_user, *args, **kwargs)
+        return decorated
+    return decorator
@@ -0,0 +1,115 @@
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import exists, func, insert, literal, select
+from sqlalchemy.orm import aliased
+
+from src.extensions import db
+from src.models.schedule import Shift, TimeOffRequest
+from src.utils import audit
+from src.utils.sql import add_days
+
+COPY_COLUMNS = ('business_id', 'location_id', 'employee_id', 'start_time', 'end_time', 'role', 'notes', 'copy_batch',
+                'created_at', 'updated_at')
+
+
+def _copy_plan(business_id, source_start, target_start, days, employee_ids=None, roles=None, location_id=None):
+    """Return (shifted start, shifted end, conflict expressions, source filters)."""
+    offset = (target_start - source_start).days
+    new_start = add_days(Shift.start_time, offset)
+    new_end = add_days(Shift.end_time, offset)
+
+    existing = aliased(Shift)
+    shift_conflict = exists().where(
+        existing.employee_id == Shift.employee_id,
+        existing.start_time < new_end,
+        existing.end_time > new_start
+    )
+    time_off_conflict = exists().where(
+        TimeOffRequest.employee_id == Shift.employee_id,
+        TimeOffRequest.status == 'approved',
+        TimeOffRequest.start_date < new_end,
+        TimeOffRequest.end_date > new_start
+    )
+
+    filters = [
+        Shift.business_id == business_id,
+        Shift.start_time >= source_start,
+        Shift.start_time < source_start + timedelta(days=days)
+    ]
+    if employee_ids:
+        filters.append(Shift.employee_id.in_(employee_ids))
+    if roles:
+        filters.append(Shift.role.in_(roles))
+    if location_id is not None:
+        filters.append(Shift.location_id == location_id)
+    return new_start, new_end, shift_conflict, time_off_conflict, filters
+
+
+def preview_copy(business_id, source_start, target_start, days=7, employee_ids=None, roles=None, location_id=None):
+    """Dry run: the shifts a copy would create and the ones it would skip."""
+    new_start, new_end, shift_conflict, time_off_conflict, filters = _copy_plan(
+        business_id, source_start, target_start, days, employee_ids, roles, location_id)
+
+    rows = db.session.execute(
+        select(
+            Shift.id, Shift.location_id, Shift.employee_id, new_start, new_end, Shift.role,
+            shift_conflict.label('shift_conflict'), time_off_conflict.label('time_off_conflict')
+        ).where(*filters).order_by(Shift.start_time, Shift.employee_id)
+    ).all()
+
+    creates, conflicts = [], []
+    for shift_id, location_id, employee_id, start_time, end_time, role, has_shift, has_time_off in rows:
+        entry = {
+            'source_shift_id': shift_id,
+            'location_id': location_id,
+            'employee_id': employee_id,
+            'start_time': start_time.strftime('%Y-%m-%d %H:%M:%S'),
+            'end_time': end_time.strftime('%Y-%m-%d %H:%M:%S'),
+            'role': role
+        }
+        if has_shift or has_time_off:
+            entry['reason'] = 'shift_conflict' if has_shift else 'time_off'
+            conflicts.append(entry)
+        else:
+            creates.append(entry)
+    return {'create': creates, 'conflicts': conflicts}
+
+
+def copy_shifts(business_id, source_start, target_start, days=7, employee_ids=None, roles=None, location_id=None,
+                copy_batch=None):
+    """Duplicate a range of shifts with a single INSERT ... SELECT.
+
+    Shifts that would overlap an existing shift of the same employee or an
+    approved time-off request are skipped. Every new row is tagged with
+    ``copy_batch`` so callers can find the batch again. The caller commits.
+    Returns ``(created, skipped)`` counts.
+    """
+    new_start, new_end, shift_conflict, time_off_conflict, filters = _copy_plan(
+        business_id, source_start, target_start, days, employee_ids, roles, location_id)
+    conflicted = shift_conflict | time_off_conflict
+
+    # Count skips before inserting, otherwise the new rows conflict with themselves
+    skipped = db.session.execute(
+        select(func.count()).select_from(Shift).where(*filters, conflicted)
+    ).scalar()
+
+    now = datetime.utcnow()
+    source = select(
+        Shift.business_id, Shift.location_id, Shift.employee_id, new_start, new_end, Shift.role, Shift.notes,
+        literal(copy_batch, db.String), literal(now, db.DateTime), literal(now, db.DateTime)
+    ).where(*filters, ~conflicted)
+    result = db.session.execute(insert(Shift).from_select(COPY_COLUMNS, source))
+    return result.rowcount, skipped
+
+
+def copy_and_audit(business_id, user_id, source_start, target_start, days=7, employee_ids=None, roles=None,
+                   location_id=None):
+    """Copy shifts, log them in the audit trail and commit; returns (created, skipped)."""
+    copy_batch = uuid.uuid4().hex
+    created, skipped = copy_shifts(business_id, source_start, target_start, days, employee_ids, roles, location_id,
+                                   copy_batch=copy_batch)
+    if created:
+        audit.record_copied_shifts(business_id, user_id, copy_batch, source_start)
+    db.session.commit()
+    return created, skipped
@@ -0,0 +1,163 @@
+import logging
+import re
+
+from flask import current_app
+from sqlalchemy import Integer, and_, column, func, literal_column, or_, text
+from sqlalchemy.exc import SQLAlchemyError
+
+from src.extensions import db
+from src.models.user import Employee
+
+logger = logging.getLogger(__name__)
+
+SEARCH_COLUMNS = (Employee.id, Employee.name, Employee.email, Employee.role)
+
+_SQLITE_FTS_DDL = (
+    """CREATE VIRTUAL TABLE IF NOT EXISTS employees_fts USING fts5(
+        name, email, role, content='employees', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2')""",
+    """CREATE TRIGGER IF NOT EXISTS employees_fts_ai AFTER INSERT ON employees BEGIN
+        INSERT INTO employees_fts(rowid, name, email, role) VALUES (new.id, new.name, new.email, new.role);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS employees_fts_ad AFTER DELETE ON employees BEGIN
+        INSERT INTO employees_fts(employees_fts, rowid, name, email, role)
+        VALUES ('delete', old.id, old.name, old.email, old.role);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS employees_fts_au AFTER UPDATE ON employees BEGIN
+        INSERT INTO employees_fts(employees_fts, rowid, name, email, role)
+        VALUES ('delete', old.id, old.name, old.email, old.role);
+        INSERT INTO employees_fts(rowid, name, email, role) VALUES (new.id, new.name, new.email, new.role);
+    END""",
+)
+
+_POSTGRES_DDL = (
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_employees_name_trgm ON employees USING gin (lower(name) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_employees_email_trgm ON employees USING gin (lower(email) gin_trgm_ops)",
+    """CREATE INDEX IF NOT EXISTS ix_employees_search_tsv ON employees USING gin (
+        to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(email, '') || ' ' || coalesce(role, '')))""",
+)
+
+
+def init_employee_search(app):
+    """Create dialect-specific search indexes; must run inside an app context.
+
+    SQLite gets an external-content FTS5 table kept in sync by triggers,
+    Postgres gets trigram and tsvector GIN indexes. Other databases (or a
+    SQLite build without FTS5) fall back to ``LIKE``, which scans the
+    business's employees for name and free-text searches. Email and role
+    prefixes always use the ``lower(...)`` expression indexes declared on
+    the model.
+    """
+    dialect = db.engine.dialect.name
+    backend = 'like'
+    try:
+        with db.engine.begin() as conn:
+            if dialect == 'sqlite':
+                exists = conn.execute(text(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'employees_fts'"
+                )).first()
+                for statement in _SQLITE_FTS_DDL:
+                    conn.execute(text(statement))
+                if not exists:
+                    conn.execute(text("INSERT INTO employees_fts(employees_fts) VALUES ('rebuild')"))
+                backend = 'fts5'
+            elif dialect == 'postgresql':
+                for statement in _POSTGRES_DDL:
+                    conn.execute(text(statement))
+                backend = 'postgresql'
+    except SQLAlchemyError:
+        logger.warning('Employee search indexes unavailable on %s; using LIKE prefix search', dialect, exc_info=True)
+    app.extensions['employee_search'] = backend
+
+
+def _tokens(term):
+    return re.findall(r'\w+', term.lower())
+
+
+def _escape_like(term):
+    return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _prefix(column, term):
+    """Case-insensitive prefix match on ``lower(column)``.
+
+    The range bounds let the (business_id, lower(column)) index seek to
+    the prefix, which a LIKE on an expression cannot do; the LIKE keeps
+    the match exact under any collation.
+    """
+    term = term.lower()
+    lowered = func.lower(column)
+    clauses = [lowered.like(_escape_like(term) + '%', escape='\\')]
+    if term:
+        clauses.append(lowered >= term)
+        if ord(term[-1]) < 0xD7FF:
+            clauses.append(lowered < term[:-1] + chr(ord(term[-1]) + 1))
+    return and_(*clauses)
+
+
+def _fts_match(tokens, column=None):
+    scope = f'{column} : ' if column else ''
+    return ' AND '.join(f'{scope}"{token}"*' for token in tokens)
+
+
+def _word_prefix_filter(column, tokens):
+    """Every token must prefix some word of ``column`` (used for names)."""
+    clauses = []
+    for token in tokens:
+        pattern = _escape_like(token)
+        clauses.append(or_(
+            func.lower(column).like(pattern + '%', escape='\\'),
+            func.lower(column).like('% ' + pattern + '%', escape='\\'),
+        ))
+    return clauses
+
+
+def employee_search_query(business_id, q=None, name=None, email=None, role=None, location_id=None):
+    """Build a query over the projected employee columns for one business.
+
+    ``name`` matches word prefixes ("smi" finds "John Smith"), ``email``
+    and ``role`` match from the start of the value, and ``q`` matches
+    word prefixes across all three.
+    """
+    backend = current_app.extensions.get('employee_search', 'like')
+    query = db.session.query(*SEARCH_COLUMNS).filter(Employee.business_id == business_id)
+    if location_id is not None:
+        query = query.filter(Employee.location_id == location_id)
+
+    fts_terms = []
+    if name and _tokens(name):
+        if backend == 'fts5':
+            fts_terms.append(_fts_match(_tokens(name), 'name'))
+        else:
+            query = query.filter(*_word_prefix_filter(Employee.name, _tokens(name)))
+
+    if q and _tokens(q):
+        if backend == 'fts5':
+            fts_terms.append(_fts_match(_tokens(q)))
+        elif backend == 'postgresql':
+            search_vector = func.to_tsvector(
+                literal_column("'simple'"),
+                func.coalesce(Employee.name, '') + ' ' + func.coalesce(Employee.email, '') + ' ' +
+                func.coalesce(Employee.role, ''))
+            ts_query = func.to_tsquery(literal_column("'simple'"), ' & '.join(f'{token}:*' for token in _tokens(q)))
+            query = query.filter(search_vector.op('@@')(ts_query))
+        else:
+            for token in _tokens(q):
+                query = query.filter(or_(
+                    *_word_prefix_filter(Employee.name, [token]),
+                    _prefix(Employee.email, token),
+                    _prefix(Employee.role, token),
+                ))
+
+    if fts_terms:
+        match = text('SELECT rowid FROM employees_fts WHERE employees_fts MATCH :match').bindparams(
+            match=' AND '.join(f'({term})' for term in fts_terms)).columns(column('rowid', Integer))
+        query = query.filter(Employee.id.in_(match))
+
+    if email:
+        query = query.filter(_prefix(Employee.email, email.strip()))
+    if role:
+        query = query.filter(_prefix(Employee.role, role.strip()))
+
+    return query
@@ -0,0 +1,46 @@
+from sqlalchemy import DateTime, literal
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+
+class add_days(FunctionElement):
+    """``column + N days`` as portable SQL, for set-based date shifting.
+
+    SQLite keeps the column's stored text format (including any fractional
+    seconds) so shifted values still compare correctly as strings.
+    """
+    type = DateTime()
+    name = 'add_days'
+    inherit_cache = True
+
+    def __init__(self, column, days):
+        super().__init__(column, literal(int(days)), literal(f'{int(days):+d} days'))
+
+
+def _args(element, compiler, **kw):
+    column, days, modifier = list(element.clauses)
+    return compiler.process(column, **kw), compiler.process(days, **kw), compiler.process(modifier, **kw)
+
+
+@compiles(add_days)
+def _add_days_default(element, compiler, **kw):
+    column, days, _ = _args(element, compiler, **kw)
+    return f"({column} + {days} * INTERVAL '1' DAY)"
+
+
+@compiles(add_days, 'sqlite')
+def _add_days_sqlite(element, compiler, **kw):
+    column, _, modifier = _args(element, compiler, **kw)
+    return f'(datetime({column}, {modifier}) || substr({column}, 20))'
+
+
+@compiles(add_days, 'postgresql')
+def _add_days_postgresql(element, compiler, **kw):
+    column, days, _ = _args(element, compiler, **kw)
+    return f'({column} + make_interval(days => {days}))'
+
+
+@compiles(add_days, 'mysql')
+def _add_days_mysql(element, compiler, **kw):
+    column, days, _ = _args(element, compiler, **kw)
+    return f'DATE_ADD({column}, INTERVAL {days} DAY)'
@@ -0,0 +1,46 @@
+from flask import has_request_context, request
+
+from src.extensions import db
+from src.models.user import Business
+
+
+class TenantError(RuntimeError):
+    pass
+
+
+def request_cache():
+    """Storage that lives exactly as long as the current request.
+
+    Not ``g``: that belongs to the app context, which every request shares
+    while one is already pushed (scripts, tests, the worker).
+    """
+    return request.environ.setdefault('crewly.tenant', {})
+
+
+def current_principal():
+    """The authenticated user, loaded once per request by ``token_required``."""
+    user = request_cache().get('user') if has_request_context() else None
+    if user is None:
+        raise TenantError('No authenticated user in this request!')
+    return user
+
+
+def current_business_id():
+    return current_principal().business_id
+
+
+def current_business():
+    """The principal's business, queried at most once per request."""
+    cache = request_cache() if has_request_context() else {}
+    if 'business' not in cache:
+        cache['business'] = db.session.get(Business, current_business_id())
+    return cache['business']
+
+
+def scoped(model):
+    """``model.query`` already filtered to the current business.
+
+    Use it for every tenant-owned table so a handler cannot forget the
+    ``business_id`` filter.
+    """
+    return model.query.filter(model.business_id == current_business_id())
@@ -0,0 +1,80 @@
+"""Background job worker: claims queued jobs from the database and runs them.
+
+    python -m src.worker --processes 2
+    python -m src.worker --once   # drain the queue and exit
+
+Needs no broker: web processes insert rows into ``jobs`` (uploads
+included) and workers poll for them. Run it on any host that reaches
+the same database as gunicorn.
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import time
+
+logger = logging.getLogger('crewly.worker')
+
+
+def work(index, poll_interval, once):
+    from src.main import create_app
+    from src.utils.jobs import claim_next, requeue_stale, run_job
+
+    stopping = []
+    # Finish the current job, then exit
+    signal.signal(signal.SIGTERM, lambda *_: stopping.append(True))
+    signal.signal(signal.SIGINT, lambda *_: stopping.append(True))
+
+    app = create_app()
+    name = f'{socket.gethostname()}:{os.getpid()}:{index}'
+    last_sweep = 0.0
+    with app.app_context():
+        while not stopping:
+            if time.monotonic() - last_sweep > 60:
+                requeued = requeue_stale()
+                if requeued:
+                    logger.warning('Requeued %d stale jobs', requeued)
+                last_sweep = time.monotonic()
+
+            job = claim_next(name)
+            if job is None:
+                if once:
+                    return
+                time.sleep(poll_interval)
+                continue
+            logger.info('%s running job %s (%s)', name, job.id, job.kind)
+            run_job(job)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--processes', type=int, default=2)
+    parser.add_argument('--poll-interval', type=float, default=1.0, help='seconds to wait when the queue is empty')
+    parser.add_argument('--once', action='store_true', help='exit once the queue is empty')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(name)s %(levelname)s %(message)s')
+
+    if args.processes == 1:
+        work(0, args.poll_interval, args.once)
+        return
+
+    processes = [multiprocessing.Process(target=work, args=(i, args.poll_interval, args.once), daemon=False)
+                 for i in range(args.processes)]
+    for process in processes:
+        process.start()
+
+    def stop(*_):
+        for process in processes:
+            if process.is_alive():
+                process.terminate()  # SIGTERM: children stop after their current job
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for process in processes:
+        process.join()
+
+
+if __name__ == '__main__':
+    main()